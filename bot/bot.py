@@ -1,15 +1,30 @@
+import asyncio
 import logging
+import signal
 import discord
 from discord.ext import commands
+from bot import db
 from bot.settings import config
+from bot.utils.metrics import monitor_event_loop_lag, start_metrics_server
+from bot.utils.rate_limit import load_scripts
+from bot.utils.watchdog import LoopWatchdog
 
 from bot.utils.logging_utils import setup_logging
 
-setup_logging()
+setup_logging(config.log_sample_rates)
 logger = logging.getLogger(__name__)
 
+
+class CardBot(commands.Bot):
+    async def close(self):
+        # Extensions are unloaded first, so no new rewards arrive while the
+        # write-behind buffer is written out.
+        await super().close()
+        await db.close_pool()
+
+
 intents = discord.Intents.default()
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = CardBot(command_prefix="!", intents=intents)
 
 
 @bot.event
@@ -20,10 +35,22 @@ async def on_ready():
 
 @bot.event
 async def setup_hook():
+    await db.open_pool()
+    # docker stop sends SIGTERM; shut down cleanly so buffered rewards are written.
+    bot.loop.add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(bot.close()))
+    await load_scripts()
+    await start_metrics_server(config.metrics_host, config.metrics_port)
+    bot.loop_lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    if config.watchdog_enabled:
+        bot.watchdog = LoopWatchdog(config.watchdog_threshold, config.watchdog_profile_path)
+        bot.watchdog.start()
     await bot.load_extension("bot.commands.open_pack")
     await bot.load_extension("bot.commands.agent")
     await bot.load_extension("bot.commands.show_cards")
     await bot.load_extension("bot.commands.trade_card")
+    await bot.load_extension("bot.commands.search_card")
+    await bot.load_extension("bot.commands.stats")
+    await bot.load_extension("bot.commands.catalog_reload")
 
 
 bot.run(config.discord_bot_token)
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from bot.catalog import Card, Catalog
+
+LIST_SEPARATOR = ", "
+
+
+def _joined(values: tuple[str, ...]) -> str | None:
+    return LIST_SEPARATOR.join(values) if values else None
+
+
+# Only the columns the /agent prompt allows, in prompt order. Text stays in object
+# columns: the strings are the Catalog's own, so each row costs a pointer, and
+# groupby/value_counts never report the zero-count rows categoricals would.
+# subtypes and types are joined into plain strings ("Basic, V") so `.str.contains`
+# works on them; release dates are parsed so they compare and sort as dates.
+CARD_FRAME_SCHEMA: dict[str, tuple] = {
+    "name": (lambda c: c.name, object),
+    "supertype": (lambda c: c.supertype, object),
+    "subtypes": (lambda c: _joined(c.subtypes), object),
+    "types": (lambda c: _joined(c.types), object),
+    "rarity": (lambda c: c.rarity, object),
+    "number": (lambda c: c.number, object),
+    "set_name": (lambda c: c.set.name, object),
+    "set_series": (lambda c: c.set.series, object),
+    "set_total": (lambda c: c.set.total, "Int16"),
+    "set_printedTotal": (lambda c: c.set.printed_total, "Int16"),
+    "set_releaseDate": (lambda c: c.set.release_date, "datetime64[ns]"),
+    "set_ptcgoCode": (lambda c: c.set.ptcgo_code, object),
+    "set_legalities_unlimited": (lambda c: c.set.legalities_unlimited, object),
+    "set_legalities_expanded": (lambda c: c.set.legalities_expanded, object),
+    "images_small": (lambda c: c.image_small, object),
+    "images_large": (lambda c: c.image_large, object),
+}
+
+def _column(values: list, dtype) -> pd.Series:
+    if dtype == "datetime64[ns]":
+        # The API writes dates as "2023/03/31"; anything else becomes NaT.
+        return pd.Series(pd.to_datetime(values, format="%Y/%m/%d", errors="coerce"))
+    return pd.Series(values, dtype=dtype)
+
+
+def build_card_frame(catalog: Catalog) -> pd.DataFrame:
+    cards: tuple[Card, ...] = catalog.cards
+    return pd.DataFrame(
+        {
+            name: _column([getter(card) for card in cards], dtype)
+            for name, (getter, dtype) in CARD_FRAME_SCHEMA.items()
+        }
+    )
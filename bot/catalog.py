@@ -0,0 +1,282 @@
+import hashlib
+import json
+import logging
+import mmap
+import sys
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+from bot import catalog_format
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path("/app/data")
+CATALOG_FILES = ("catalog.bin", "sets.json", "enums.json", "cards.json")
+
+
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if value else value
+
+
+@dataclass(frozen=True, slots=True)
+class CardSet:
+    id: str
+    name: str
+    series: str | None = None
+    printed_total: int | None = None
+    total: int | None = None
+    release_date: str | None = None
+    updated_at: str | None = None
+    ptcgo_code: str | None = None
+    legalities_unlimited: str | None = None
+    legalities_expanded: str | None = None
+
+    @classmethod
+    def from_json(cls, data: dict) -> "CardSet":
+        legalities = data.get("legalities") or {}
+        return cls(
+            id=_intern(data["id"]),
+            name=_intern(data["name"]),
+            series=_intern(data.get("series")),
+            printed_total=data.get("printedTotal"),
+            total=data.get("total"),
+            release_date=_intern(data.get("releaseDate")),
+            updated_at=data.get("updatedAt"),
+            ptcgo_code=_intern(data.get("ptcgoCode")),
+            legalities_unlimited=_intern(legalities.get("unlimited")),
+            legalities_expanded=_intern(legalities.get("expanded")),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Card:
+    id: str
+    name: str
+    set: CardSet
+    number: str | None = None
+    supertype: str | None = None
+    subtypes: tuple[str, ...] = ()
+    types: tuple[str, ...] = ()
+    rarity: str | None = None
+    image_small: str | None = None
+    image_large: str | None = None
+
+    @classmethod
+    def from_json(cls, data: dict, card_set: CardSet) -> "Card":
+        images = data.get("images") or {}
+        return cls(
+            id=data["id"],
+            name=_intern(data.get("name", "Unknown")),
+            set=card_set,
+            number=data.get("number"),
+            supertype=_intern(data.get("supertype")),
+            subtypes=tuple(_intern(s) for s in data.get("subtypes") or ()),
+            types=tuple(_intern(t) for t in data.get("types") or ()),
+            rarity=_intern(data.get("rarity")),
+            image_small=images.get("small"),
+            image_large=images.get("large"),
+        )
+
+
+class Catalog:
+    """Read-only view of the card catalog shared by every cog.
+
+    Cards are stored once; ``by_id``, ``by_set``, ``by_name`` and
+    ``by_set_and_name`` all point at the same ``Card`` instances, and each
+    ``Card`` references a shared ``CardSet``.
+    """
+
+    def __init__(
+        self,
+        cards: list[Card],
+        sets: list[CardSet],
+        enums: dict[str, list[str]],
+        version: str = "",
+    ):
+        self.version = version
+        self.cards: tuple[Card, ...] = tuple(cards)
+        self.enums = enums
+        self.sets: dict[str, CardSet] = {s.name: s for s in sets}
+        self.by_id: dict[str, Card] = {card.id: card for card in self.cards}
+
+        by_set: dict[str, list[Card]] = {}
+        by_name: dict[str, list[Card]] = {}
+        by_set_and_name: dict[tuple[str, str], list[Card]] = {}
+        for card in self.cards:
+            by_set.setdefault(card.set.name, []).append(card)
+            by_name.setdefault(card.name, []).append(card)
+            by_set_and_name.setdefault((card.set.name, card.name), []).append(card)
+        self.by_set: dict[str, tuple[Card, ...]] = {k: tuple(v) for k, v in by_set.items()}
+        self.by_name: dict[str, tuple[Card, ...]] = {k: tuple(v) for k, v in by_name.items()}
+        self.by_set_and_name: dict[tuple[str, str], tuple[Card, ...]] = {
+            k: tuple(v) for k, v in by_set_and_name.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def card_label(self, card: Card) -> str:
+        """The card's name, plus its number if the set has other printings with that name."""
+        if len(self.by_set_and_name[(card.set.name, card.name)]) > 1 and card.number:
+            return f"{card.name} #{card.number}"
+        return card.name
+
+    def resolve_card(self, set_name: str, value: str) -> Card | None:
+        """Find the card a command option refers to within ``set_name``.
+
+        ``value`` is a card id when picked from autocomplete; typed values may be
+        a name or "name #number". A name shared by several printings in the set is
+        ambiguous and resolves to ``None``.
+        """
+        card = self.by_id.get(value)
+        if card is not None:
+            return card if card.set.name == set_name else None
+
+        cards = self.by_set_and_name.get((set_name, value))
+        if cards is None:
+            name, sep, number = value.rpartition(" #")
+            if not sep:
+                return None
+            cards = tuple(c for c in self.by_set_and_name.get((set_name, name), ()) if c.number == number)
+        return cards[0] if len(cards) == 1 else None
+
+
+def load_catalog(data_dir: Path = DATA_DIR) -> Catalog:
+    """Load ``catalog.bin`` if the fetch step wrote one, otherwise the JSON files."""
+    if (data_dir / "catalog.bin").exists():
+        catalog = load_catalog_bin(data_dir)
+    else:
+        catalog = load_catalog_json(data_dir)
+    logger.info(
+        f"Loaded catalog {catalog.version}: {len(catalog.cards)} cards in {len(catalog.sets)} sets"
+    )
+    return catalog
+
+
+def load_catalog_bin(data_dir: Path = DATA_DIR) -> Catalog:
+    with open(data_dir / "enums.json", "rb") as f:
+        enums_raw = f.read()
+    with open(data_dir / "catalog.bin", "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        digest = hashlib.sha1(mm)
+        digest.update(enums_raw)
+        magic, n_strings, blob_len, n_lists, pool_len, n_sets, n_cards = catalog_format.HEADER.unpack_from(mm, 0)
+        if magic != catalog_format.MAGIC:
+            raise ValueError(f"{data_dir / 'catalog.bin'} is not a catalog file")
+        pos = catalog_format.HEADER.size
+
+        def column(n: int) -> array:
+            nonlocal pos
+            values = array("I")
+            values.frombytes(mm[pos:pos + 4 * n])
+            if sys.byteorder == "big":
+                values.byteswap()
+            pos += 4 * n
+            return values
+
+        offsets = column(n_strings + 1)
+        text = mm[pos:pos + blob_len].decode("utf-8")
+        pos += blob_len + (-blob_len % 4)
+        list_offsets = column(n_lists + 1)
+        pool = column(pool_len)
+        set_columns = [column(n_sets) for _ in catalog_format.SET_STRING_COLUMNS]
+        set_ints = [column(n_sets) for _ in catalog_format.SET_INT_COLUMNS]
+        card_columns = [column(n_cards) for _ in catalog_format.CARD_STRING_COLUMNS]
+        set_idx, subtypes, types = column(n_cards), column(n_cards), column(n_cards)
+
+    # One decode, then slices. The table is deduplicated, so cards share these objects.
+    strings = dict(enumerate(map(text.__getitem__, map(slice, offsets[:-1], offsets[1:]))))
+    strings[catalog_format.NONE] = None
+    lookup = strings.__getitem__
+    lists = [
+        tuple(map(lookup, pool[list_offsets[i]:list_offsets[i + 1]])) for i in range(n_lists)
+    ]
+
+    set_fields = catalog_format.SET_STRING_COLUMNS + catalog_format.SET_INT_COLUMNS
+    sets = [
+        CardSet(**dict(zip(set_fields, row)))
+        for row in zip(
+            *(map(lookup, col) for col in set_columns),
+            *([None if v == catalog_format.NONE else v for v in col] for col in set_ints),
+        )
+    ]
+    ids, names, numbers, supertypes, rarities, smalls, larges = (list(map(lookup, col)) for col in card_columns)
+    cards = list(map(
+        Card,
+        ids,
+        names,
+        map(sets.__getitem__, set_idx),
+        numbers,
+        supertypes,
+        map(lists.__getitem__, subtypes),
+        map(lists.__getitem__, types),
+        rarities,
+        smalls,
+        larges,
+    ))
+    return Catalog(cards, sets, json.loads(enums_raw), version=digest.hexdigest()[:12])
+
+
+def load_catalog_json(data_dir: Path = DATA_DIR) -> Catalog:
+    digest = hashlib.sha1()
+
+    def read(filename: str):
+        with open(data_dir / filename, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        with open(data_dir / filename, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    sets_by_id = {s["id"]: CardSet.from_json(s) for s in read("sets.json")}
+    enums = read("enums.json")
+    raw_cards = read("cards.json")
+
+    cards = []
+    for raw in raw_cards:
+        set_info = raw.get("set") or {}
+        set_id = set_info.get("id")
+        if not set_id or not set_info.get("name"):
+            continue
+        card_set = sets_by_id.get(set_id)
+        if card_set is None:
+            card_set = sets_by_id[set_id] = CardSet.from_json(set_info)
+        cards.append(Card.from_json(raw, card_set))
+    del raw_cards
+
+    return Catalog(cards, list(sets_by_id.values()), enums, version=digest.hexdigest()[:12])
+
+
+def catalog_stamp(data_dir: Path = DATA_DIR) -> tuple:
+    """Cheap change detector for the catalog files: (mtime, size) of each one present."""
+    stamp = []
+    for filename in CATALOG_FILES:
+        try:
+            stat = (data_dir / filename).stat()
+        except FileNotFoundError:
+            continue
+        stamp.append((filename, stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+_catalog: Catalog | None = None
+
+
+def get_catalog() -> Catalog:
+    global _catalog
+    if _catalog is None:
+        _catalog = load_catalog()
+    return _catalog
+
+
+def reload_catalog(data_dir: Path = DATA_DIR) -> Catalog | None:
+    """Load the catalog files again and swap them in if their contents changed.
+
+    Returns the new catalog, or ``None`` if it's the same version as the current one.
+    Blocking; call it off the event loop.
+    """
+    global _catalog
+    catalog = load_catalog(data_dir)
+    if _catalog is not None and catalog.version == _catalog.version:
+        return None
+    _catalog = catalog
+    return catalog
@@ -0,0 +1,136 @@
+"""Compact binary form of the catalog (``catalog.bin``).
+
+Written by ``fetch_cards.py`` next to the JSON files and memory-mapped by
+``bot.catalog`` at startup. Stdlib only: the bot-base image copies this module
+alongside the fetch script.
+
+Layout (all integers little-endian u32, every section 4-byte aligned):
+
+    header          magic, string count, string blob bytes, list count, list pool length,
+                    set count, card count
+    string offsets  string count + 1 character offsets into the decoded blob
+    string blob     every string concatenated as one UTF-8 blob, padded to 4 bytes
+    list offsets    list count + 1 offsets into the list pool
+    list pool       string ids (subtypes / types tuples, deduplicated)
+    set columns     one column per SET_STRING_COLUMNS entry, then SET_INT_COLUMNS
+    card columns    one column per CARD_STRING_COLUMNS entry, then set index, subtypes, types
+
+String ids and ints use NONE for a missing value. Every string, including
+repeated rarities or set names, is stored once; the reader decodes the blob in
+one call and slices it.
+"""
+import os
+import struct
+from typing import Iterable
+
+MAGIC = b"PTCGCAT\x01"
+HEADER = struct.Struct("<8s6I")
+NONE = 0xFFFFFFFF
+
+SET_STRING_COLUMNS = (
+    "id", "name", "series", "release_date", "updated_at", "ptcgo_code",
+    "legalities_unlimited", "legalities_expanded",
+)
+SET_INT_COLUMNS = ("printed_total", "total")
+CARD_STRING_COLUMNS = ("id", "name", "number", "supertype", "rarity", "image_small", "image_large")
+
+
+def _set_row(data: dict) -> dict:
+    legalities = data.get("legalities") or {}
+    return {
+        "id": data["id"],
+        "name": data["name"],
+        "series": data.get("series"),
+        "release_date": data.get("releaseDate"),
+        "updated_at": data.get("updatedAt"),
+        "ptcgo_code": data.get("ptcgoCode"),
+        "legalities_unlimited": legalities.get("unlimited"),
+        "legalities_expanded": legalities.get("expanded"),
+        "printed_total": data.get("printedTotal"),
+        "total": data.get("total"),
+    }
+
+
+def _pad(blob: bytes) -> bytes:
+    return blob + b"\0" * (-len(blob) % 4)
+
+
+def _u32(values: Iterable[int]) -> bytes:
+    values = list(values)
+    return struct.pack(f"<{len(values)}I", *values)
+
+
+def encode_catalog(sets: list[dict], cards: list[dict]) -> bytes:
+    """Encode the pokemontcg.io ``sets`` / ``cards`` JSON the same way load_catalog reads it."""
+    strings: dict[str, int] = {}
+    lists: dict[tuple[int, ...], int] = {}
+    list_pool: list[int] = []
+    list_offsets = [0]
+
+    def sid(value) -> int:
+        if value is None:
+            return NONE
+        return strings.setdefault(str(value), len(strings))
+
+    def lid(values) -> int:
+        key = tuple(sid(v) for v in values or ())
+        index = lists.get(key)
+        if index is None:
+            index = lists[key] = len(lists)
+            list_pool.extend(key)
+            list_offsets.append(len(list_pool))
+        return index
+
+    set_rows = [_set_row(s) for s in sets]
+    set_index = {row["id"]: i for i, row in enumerate(set_rows)}
+
+    card_rows = []
+    for raw in cards:
+        set_info = raw.get("set") or {}
+        set_id = set_info.get("id")
+        if not set_id or not set_info.get("name"):
+            continue
+        if set_id not in set_index:
+            set_index[set_id] = len(set_rows)
+            set_rows.append(_set_row(set_info))
+        images = raw.get("images") or {}
+        card_rows.append((
+            raw["id"], raw.get("name", "Unknown"), raw.get("number"), raw.get("supertype"),
+            raw.get("rarity"), images.get("small"), images.get("large"),
+            set_index[set_id], raw.get("subtypes"), raw.get("types"),
+        ))
+
+    set_columns = [_u32(sid(row[col]) for row in set_rows) for col in SET_STRING_COLUMNS]
+    set_columns += [
+        _u32(NONE if row[col] is None else row[col] for row in set_rows) for col in SET_INT_COLUMNS
+    ]
+    card_columns = [_u32(sid(row[i]) for row in card_rows) for i in range(len(CARD_STRING_COLUMNS))]
+    card_columns.append(_u32(row[7] for row in card_rows))
+    card_columns.append(_u32(lid(row[8]) for row in card_rows))
+    card_columns.append(_u32(lid(row[9]) for row in card_rows))
+
+    string_offsets = [0]
+    for s in strings:
+        string_offsets.append(string_offsets[-1] + len(s))
+    blob = "".join(strings).encode("utf-8")
+
+    return b"".join([
+        HEADER.pack(
+            MAGIC, len(strings), len(blob), len(lists), len(list_pool), len(set_rows), len(card_rows)
+        ),
+        _u32(string_offsets),
+        _pad(blob),
+        _u32(list_offsets),
+        _u32(list_pool),
+        *set_columns,
+        *card_columns,
+    ])
+
+
+def write_catalog(path: str, sets: list[dict], cards: list[dict]) -> int:
+    data = encode_catalog(sets, cards)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
@@ -1,19 +1,25 @@
-import json
+import asyncio
+import contextvars
 import logging
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 import discord
 import pandas as pd
 from discord import Interaction, app_commands
 from discord.ext import commands
-from openai import OpenAI as RawOpenAI
+from openai import AsyncOpenAI
 from pandasai import Agent
 from pandasai.llm.openai import OpenAI
+from bot.card_frame import build_card_frame
+from bot.catalog import Catalog, get_catalog
+from bot.query_engine import QueryEngine
 from bot.settings import config
-from bot.utils.logging_utils import inject_log_context, log_time
+from bot.utils.answer_cache import AnswerCache, Lookup, RedisAnswerCache, SqliteAnswerCache
+from bot.utils.logging_utils import inject_log_context
+from bot.utils.metrics import AGENT_STAGE_DURATION, COMMAND_DURATION, timed
+from bot.utils.redis_client import redis_client
 
 logger = logging.getLogger(__name__)
-DATA_DIR = Path("/app/data")
 MAX_CHARACTERS = 1800
 MAX_AGENT_RESULT_ROWS = 500
 
@@ -35,27 +41,32 @@ def chunk_text(text: str, max_len: int = MAX_CHARACTERS) -> list[str]:
             start += 1  
     return chunks
 
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # A speculative task may be dropped unawaited; reading its exception here
+    # keeps asyncio from logging "Task exception was never retrieved".
+    if not task.cancelled():
+        task.exception()
+
+
 class AgentCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
-        with open(DATA_DIR / "cards.json", "r", encoding="utf-8") as f:
-            cards_data = json.load(f)
-
-        with open(DATA_DIR / "enums.json", "r", encoding="utf-8") as f:
-            enums = json.load(f)
+        self.llm = OpenAI(api_token=config.openai_api_key)
+        self.format_llm = AsyncOpenAI(api_key=config.openai_api_key)
+        # pandasai's Agent keeps conversation state, so chats run one at a time
+        # off the event loop rather than in parallel.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pandasai")
+        self.answer_cache = self._build_answer_cache()
 
-        df = pd.json_normalize(cards_data, sep="_")
+        catalog = get_catalog()
+        self._use_catalog(catalog, self._prepare_catalog(catalog))
 
-        for col in df.columns:
-            if df[col].dtype == object:
-                sample = (
-                    df[col].dropna().iloc[0] if not df[col].dropna().empty else None
-                )
-                if isinstance(sample, (list, dict)):
-                    df[col] = df[col].apply(
-                        lambda x: json.dumps(x) if isinstance(x, (list, dict)) else x
-                    )
+    def _prepare_catalog(self, catalog: Catalog) -> tuple[QueryEngine, str, Agent]:
+        """Everything derived from the catalog; blocking, so reloads run it in a thread."""
+        enums = catalog.enums
+        df = build_card_frame(catalog)
 
         set_names = sorted(df["set_name"].dropna().unique())
         set_names_text = "\n- " + "\n- ".join(set_names)
@@ -74,7 +85,7 @@ class AgentCog(commands.Cog):
             + format_enum_block("Rarities", enums.get("rarities", []))
         )
 
-        self.description_text = (
+        description_text = (
             "This DataFrame contains Pokémon cards, one per row.\n\n"
             "Allowed columns you can use:\n"
             "- name, supertype, subtypes, types, rarity, number\n"
@@ -83,6 +94,8 @@ class AgentCog(commands.Cog):
             "- set_legalities_unlimited, set_legalities_expanded\n"
             "- images_small, images_large\n\n"
             "Only use those fields. Ignore all others.\n"
+            "subtypes and types hold comma-separated values such as 'Basic, V'; match them with `.str.contains()`.\n"
+            "set_releaseDate is a datetime column; compare it with dates such as `df['set_releaseDate'] > '2020-01-01'`.\n"
             "You may filter using fuzzy text matching by checking if a string is contained in a column (e.g., set_name).\n"
             "Always filter by set_name instead of set ID.\n"
             "Group by set_name to count cards, or search for names containing keywords like 'Pikachu'.\n\n"
@@ -90,11 +103,10 @@ class AgentCog(commands.Cog):
             f"\n**Valid set_name values:**\n{set_names_text}\n\n"
             f"{enum_text}\n"
             "Example row:\n"
-            "id: example-set-001\n"
             "name: Examplemon\n"
             "supertype: Pokémon\n"
-            'subtypes: ["Basic"]\n'
-            'types: ["Fire"]\n'
+            "subtypes: Basic\n"
+            "types: Fire\n"
             "number: 25\n"
             "rarity: Rare\n"
             "set_name: Sample Set\n"
@@ -148,10 +160,7 @@ class AgentCog(commands.Cog):
             "Do not use or refer to any system-level operations or modules. Stick to analyzing the DataFrame using text and filters."
         )
 
-        self.llm = OpenAI(api_token=config.openai_api_key)
-        self.format_llm = RawOpenAI(api_key=config.openai_api_key)
-
-        self.agent = Agent(
+        agent = Agent(
             df,
             config={
                 "llm": self.llm,
@@ -161,28 +170,167 @@ class AgentCog(commands.Cog):
                 "security": "low",
             },
         )
+        return QueryEngine(catalog), description_text, agent
+
+    def _use_catalog(self, catalog: Catalog, prepared: tuple[QueryEngine, str, Agent]):
+        # Plain assignments with no await in between, so a command never sees a mix of versions.
+        self.query_engine, self.description_text, self.agent = prepared
+        self.catalog_version = catalog.version
+
+    @commands.Cog.listener()
+    async def on_catalog_reload(self, catalog: Catalog):
+        prepared = await asyncio.to_thread(self._prepare_catalog, catalog)
+        self._use_catalog(catalog, prepared)
+        logger.info(f"Agent switched to catalog {catalog.version}")
+
+    def cog_unload(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _embed(self, text: str) -> list[float]:
+        response = await self.format_llm.embeddings.create(
+            model="text-embedding-3-small", input=text
+        )
+        return response.data[0].embedding
+
+    def _build_answer_cache(self) -> AnswerCache:
+        options = dict(
+            ttl=config.agent_cache_ttl,
+            max_entries=config.agent_cache_max_entries,
+            embed=self._embed if config.agent_cache_semantic else None,
+            similarity=config.agent_cache_similarity,
+        )
+        if config.agent_cache_backend == "sqlite":
+            return SqliteAnswerCache(config.agent_cache_path, **options)
+        return RedisAnswerCache(redis_client, **options)
+
+    async def _send_answer(self, interaction: Interaction, question: str, answer: str):
+        chunks = chunk_text(answer)
+        await interaction.followup.send(f"**Q:** {question}\n{chunks[0]}")
+        for chunk in chunks[1:]:
+            await interaction.followup.send(chunk)
+
+    @timed(AGENT_STAGE_DURATION, label="agent.fast_path")
+    def _fast_path(self, question: str) -> str | None:
+        return self.query_engine.answer(question)
+
+    @timed(AGENT_STAGE_DURATION, label="agent.classify")
+    async def _classify(self, question: str) -> str:
+        check_prompt = (
+            "Decide if the user question is about the Pokémon Trading Card Game "
+            "(cards, sets, rarities, legalities, images, etc).\n"
+            "If YES, reply only with 'POKEMON'.\n"
+            "If NO, reply only with 'OTHER'.\n\n"
+            f"Question: {question}"
+        )
+        check_resp = await self.format_llm.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": check_prompt}],
+            max_tokens=5,
+        )
+        return check_resp.choices[0].message.content.strip().upper()
+
+    @timed(AGENT_STAGE_DURATION, label="agent.chat")
+    async def _run_agent(self, agent: Agent, description_text: str, question: str):
+        full_prompt = f"""{description_text}\n\nNow answer this: {question}"""
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, ctx.run, agent.chat, full_prompt)
+
+    @timed(AGENT_STAGE_DURATION, label="agent.format")
+    async def _format(self, question: str, content: str) -> str:
+        prompt = (
+            "You're a Discord bot that formats answers from a Pokémon Trading Card Game (TCG) data agent.\n\n"
+            "Strict rules:\n"
+            "- Only reference Pokémon TCG. Never mention Magic: The Gathering, Yu-Gi-Oh!, or any other franchise.\n"
+            "- Do not guess or fabricate information.\n"
+            "- The user question and the agent's raw output are always about Pokémon cards or sets.\n\n"
+            "Formatting rules:\n"
+            "- Use bold for section headers and important numbers.\n"
+            "- Use bullet points or emoji bullets (• or ➤) for lists.\n"
+            "- Separate sections with clear spacing.\n"
+            "- Keep messages phone-readable (short lines, logical spacing).\n"
+            "- If the result is a table, format each row like a labeled block.\n"
+            "- Only show the **large card image** if available — do **not** show or link the small image.\n"
+            "- Never add your own commentary. Just format the output cleanly.\n"
+            "- **Do NOT add 'Answer:' or restate the question.** The question is already included in the final message.\n\n"
+            "Here are some EXAMPLES of correct formatting:\n\n"
+            "**Q: How many cards are in each set?**\n"
+            "**Set Totals:**\n"
+            "• Paldean Fates → 230 cards\n"
+            "• 151 → 165 cards\n"
+            "• Obsidian Flames → 210 cards\n\n"
+            "**Q: What are the legalities of cards in set 'Scarlet & Violet'?**\n"
+            "➤ **Scarlet & Violet**\n"
+            "• Unlimited: Legal\n"
+            "• Expanded: Legal\n\n"
+            "**Q: Find all cards with 'Charizard' in their name.**\n"
+            "**Charizard Cards Found:**\n"
+            "• Charizard ex (Obsidian Flames)\n"
+            "• Dark Charizard (Team Rocket)\n"
+            "• Radiant Charizard (Crown Zenith)\n"
+            "• Charizard VMAX (Champion’s Path)\n\n"
+            "**Q: Show me all cards in set '151' that are Rare.**\n"
+            "➤ **Set: 151**\n"
+            "• Mew ex – Rare\n"
+            "• Alakazam – Rare\n"
+            "• Zapdos – Rare\n\n"
+            f"The user asked:\n**{question}**\n\n"
+            "Here is the agent's raw output:\n"
+            f"```\n{content}\n```\n\n"
+            "Now format that raw output according to the rules and examples above."
+        )
+
+        response = await self.format_llm.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You're a helpful Discord bot formatter.",
+                },
+                {"role": "user", "content": prompt},
+            ],
+        )
+        return response.choices[0].message.content.strip()
 
     @app_commands.command(
         name="agent", description="Ask the Pokémon TCG agent a question."
     )
     @inject_log_context
-    @log_time(logger.info)
+    @timed(COMMAND_DURATION)
     async def ask_agent(self, interaction: Interaction, question: str):
         await interaction.response.defer()
+        # One catalog for the whole request: a reload landing while it awaits the
+        # LLM must not mix frames, or cache an old frame's answer under the new version.
+        catalog_version, description_text, agent = self.catalog_version, self.description_text, self.agent
+
+        # The fast path is free, so it runs before a lookup that may embed the question.
         try:
-            check_prompt = (
-                "Decide if the user question is about the Pokémon Trading Card Game "
-                "(cards, sets, rarities, legalities, images, etc).\n"
-                "If YES, reply only with 'POKEMON'.\n"
-                "If NO, reply only with 'OTHER'.\n\n"
-                f"Question: {question}"
-            )
-            check_resp = self.format_llm.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": check_prompt}],
-                max_tokens=5,
-            )
-            check_label = check_resp.choices[0].message.content.strip().upper()
+            fast_answer = self._fast_path(question)
+        except Exception:
+            logger.exception("Fast path failed; asking the agent instead")
+            fast_answer = None
+        if fast_answer:
+            await self._send_answer(interaction, question, fast_answer)
+            return
+
+        # The classifier runs speculatively alongside the cache lookup. The agent
+        # itself only starts once the question is known to be on-topic: a chat
+        # can't be stopped once it has started, and the single pandasai worker
+        # would make the next question wait behind a discarded one.
+        classify_task = asyncio.create_task(self._classify(question))
+        classify_task.add_done_callback(_retrieve_exception)
+        try:
+            cached = await self.answer_cache.get(question, catalog_version)
+        except Exception:
+            logger.exception("Answer cache lookup failed; treating it as a miss")
+            cached = Lookup(None)
+        if cached.answer:
+            classify_task.cancel()
+            await self._send_answer(interaction, question, cached.answer)
+            return
+
+        try:
+            check_label = await classify_task
 
             if check_label != "POKEMON":
                 await interaction.followup.send(
@@ -190,8 +338,7 @@ class AgentCog(commands.Cog):
                 )
                 return
 
-            full_prompt = f"""{self.description_text}\n\nNow answer this: {question}"""
-            raw_result = self.agent.chat(full_prompt)
+            raw_result = await self._run_agent(agent, description_text, question)
 
             if isinstance(raw_result, pd.DataFrame):
                 total_rows = len(raw_result)
@@ -206,69 +353,18 @@ class AgentCog(commands.Cog):
             else:
                 content = str(raw_result).strip()
 
-            prompt = (
-                "You're a Discord bot that formats answers from a Pokémon Trading Card Game (TCG) data agent.\n\n"
-                "Strict rules:\n"
-                "- Only reference Pokémon TCG. Never mention Magic: The Gathering, Yu-Gi-Oh!, or any other franchise.\n"
-                "- Do not guess or fabricate information.\n"
-                "- The user question and the agent's raw output are always about Pokémon cards or sets.\n\n"
-                "Formatting rules:\n"
-                "- Use bold for section headers and important numbers.\n"
-                "- Use bullet points or emoji bullets (• or ➤) for lists.\n"
-                "- Separate sections with clear spacing.\n"
-                "- Keep messages phone-readable (short lines, logical spacing).\n"
-                "- If the result is a table, format each row like a labeled block.\n"
-                "- Only show the **large card image** if available — do **not** show or link the small image.\n"
-                "- Never add your own commentary. Just format the output cleanly.\n"
-                "- **Do NOT add 'Answer:' or restate the question.** The question is already included in the final message.\n\n"
-                "Here are some EXAMPLES of correct formatting:\n\n"
-                "**Q: How many cards are in each set?**\n"
-                "**Set Totals:**\n"
-                "• Paldean Fates → 230 cards\n"
-                "• 151 → 165 cards\n"
-                "• Obsidian Flames → 210 cards\n\n"
-                "**Q: What are the legalities of cards in set 'Scarlet & Violet'?**\n"
-                "➤ **Scarlet & Violet**\n"
-                "• Unlimited: Legal\n"
-                "• Expanded: Legal\n\n"
-                "**Q: Find all cards with 'Charizard' in their name.**\n"
-                "**Charizard Cards Found:**\n"
-                "• Charizard ex (Obsidian Flames)\n"
-                "• Dark Charizard (Team Rocket)\n"
-                "• Radiant Charizard (Crown Zenith)\n"
-                "• Charizard VMAX (Champion’s Path)\n\n"
-                "**Q: Show me all cards in set '151' that are Rare.**\n"
-                "➤ **Set: 151**\n"
-                "• Mew ex – Rare\n"
-                "• Alakazam – Rare\n"
-                "• Zapdos – Rare\n\n"
-                f"The user asked:\n**{question}**\n\n"
-                "Here is the agent's raw output:\n"
-                f"```\n{content}\n```\n\n"
-                "Now format that raw output according to the rules and examples above."
-            )
-
-
-            response = self.format_llm.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You're a helpful Discord bot formatter.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-            )
-            formatted = response.choices[0].message.content.strip()
-            chunks = chunk_text(formatted)
-
-            await interaction.followup.send(f"**Q:** {question}\n{chunks[0]}")
-            for chunk in chunks[1:]:
-                await interaction.followup.send(chunk)
+            formatted = await self._format(question, content)
+            await self._send_answer(interaction, question, formatted)
+            try:
+                await self.answer_cache.put(question, catalog_version, formatted, cached.embedding)
+            except Exception:
+                logger.exception("Could not cache the agent answer")
 
         except Exception as e:
             logger.exception("Agent query failed")
             await interaction.followup.send(f"❌ Error: {e}")
+        finally:
+            classify_task.cancel()
 
 
 async def setup(bot: commands.Bot):
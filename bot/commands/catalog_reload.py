@@ -0,0 +1,51 @@
+import asyncio
+import logging
+
+from discord.ext import commands, tasks
+
+from bot.catalog import catalog_stamp, reload_catalog
+from bot.settings import config
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogReloadCog(commands.Cog):
+    """Watches the catalog files and hot-swaps a new catalog into every cog.
+
+    When ``fetch_cards.py --incremental`` rewrites /app/data, the new catalog is
+    loaded off the event loop and announced with a ``catalog_reload`` event; cogs
+    pick it up in ``on_catalog_reload`` and swap their derived state in one step.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.stamp = catalog_stamp()
+        if config.catalog_reload_interval > 0:
+            self.watch.change_interval(seconds=config.catalog_reload_interval)
+            self.watch.start()
+
+    def cog_unload(self):
+        self.watch.cancel()
+
+    @tasks.loop(seconds=300)
+    async def watch(self):
+        stamp = catalog_stamp()
+        if stamp == self.stamp:
+            return
+
+        try:
+            catalog = await asyncio.to_thread(reload_catalog)
+        except Exception:
+            # Most likely caught mid-sync; the stamp is left alone so the next tick retries.
+            logger.exception("Catalog reload failed; keeping the current catalog")
+            return
+        self.stamp = stamp
+        if catalog is None:
+            return
+
+        logger.info(f"Catalog changed on disk; switching to {catalog.version}")
+        self.bot.dispatch("catalog_reload", catalog)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(CatalogReloadCog(bot))
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+
+import discord
+from discord import Interaction, app_commands
+from discord.ext import commands
+
+from bot import db
+from bot.catalog import Catalog, get_catalog
+from bot.search_index import SearchIndex
+from bot.utils.logging_utils import inject_log_context
+from bot.utils.metrics import AUTOCOMPLETE_DURATION, COMMAND_DURATION, timed
+
+logger = logging.getLogger(__name__)
+
+MAX_PRINTINGS_SHOWN = 25
+
+
+def build_card_index(catalog: Catalog) -> SearchIndex[str]:
+    # Names with many printings (Pikachu, Charizard, ...) rank first among equal matches.
+    return SearchIndex(
+        ((name, name) for name in catalog.by_name),
+        popularity={name: len(cards) for name, cards in catalog.by_name.items()},
+    )
+
+
+class SearchCardCog(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.catalog = get_catalog()
+        self.card_index = build_card_index(self.catalog)
+
+    @commands.Cog.listener()
+    async def on_catalog_reload(self, catalog: Catalog):
+        card_index = await asyncio.to_thread(build_card_index, catalog)
+        self.catalog, self.card_index = catalog, card_index
+
+    @timed(AUTOCOMPLETE_DURATION)
+    async def autocomplete_name(
+        self,
+        interaction: Interaction,
+        current: str,
+    ) -> list[app_commands.Choice[str]]:
+        return [
+            app_commands.Choice(name=label, value=name)
+            for label, name in self.card_index.search(current)
+        ]
+
+    @app_commands.command(name="search_card", description="Look up every printing of a card.")
+    @app_commands.describe(name="Card name")
+    @app_commands.autocomplete(name=autocomplete_name)
+    @inject_log_context
+    @timed(COMMAND_DURATION)
+    async def search_card(self, interaction: Interaction, name: str):
+        printings = self.catalog.by_name.get(name)
+        if printings is None:
+            # Typed rather than picked: take the best match, typos included.
+            best = self.card_index.search(name, limit=1)
+            printings = self.catalog.by_name.get(best[0][1]) if best else None
+        if not printings:
+            await interaction.response.send_message(f"🔍 No card matches **{name}**.", ephemeral=True)
+            return
+
+        inventory = await db.get_inventory(str(interaction.user.id))
+        printings = sorted(printings, key=lambda c: c.set.release_date or "", reverse=True)
+
+        lines = []
+        for card in printings[:MAX_PRINTINGS_SHOWN]:
+            owned = inventory.cards.get(card.id, 0)
+            number = f" #{card.number}" if card.number else ""
+            line = f"• {card.set.name}{number} — {card.rarity or 'Unknown'}"
+            lines.append(f"{line} — **x{owned}**" if owned else line)
+        if len(printings) > MAX_PRINTINGS_SHOWN:
+            lines.append(f"…and {len(printings) - MAX_PRINTINGS_SHOWN} more")
+
+        embed = discord.Embed(
+            title=f"🔍 {printings[0].name} ({len(printings)} printings)",
+            description="\n".join(lines),
+            color=discord.Color.blue(),
+        )
+        thumbnail = printings[0].image_small or printings[0].image_large
+        if thumbnail:
+            embed.set_thumbnail(url=thumbnail)
+        await interaction.response.send_message(embed=embed)
+
+        logger.info(f"{interaction.user} searched for {printings[0].name}")
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(SearchCardCog(bot))
@@ -0,0 +1,147 @@
+import logging
+
+import discord
+from discord import Interaction, Member, app_commands
+from discord.ext import commands
+
+from bot import db
+from bot.catalog import Catalog, get_catalog
+from bot.search_index import SearchIndex
+from bot.utils.logging_utils import inject_log_context
+from bot.utils.metrics import AUTOCOMPLETE_DURATION, COMMAND_DURATION, timed
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_SIZE = 10
+MAX_SETS_SHOWN = 20
+MEDALS = ["🥇", "🥈", "🥉"]
+
+CATEGORY_TITLES = {
+    "cards": "Most cards owned",
+    "unique": "Most unique cards",
+    "hits": "Rarest pulls (ultra and secret rares)",
+}
+
+
+def _rank_label(position: int) -> str:
+    return MEDALS[position] if position < len(MEDALS) else f"`#{position + 1}`"
+
+
+def _percent(owned: int, total: int) -> str:
+    return f"{owned / total:.0%}" if total else "—"
+
+
+class StatsCog(commands.Cog):
+    """Leaderboards and set completion, read from the aggregates the database maintains.
+
+    The catalog is mirrored into card_set / catalog_card on load and on every
+    catalog reload; triggers on the inventory keep the per-player numbers current.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.catalog = get_catalog()
+        self.set_index = SearchIndex((name, name) for name in self.catalog.sets)
+
+    async def cog_load(self):
+        if await db.sync_catalog(self.catalog):
+            logger.info(f"Synced catalog {self.catalog.version} into the stats tables")
+
+    @commands.Cog.listener()
+    async def on_catalog_reload(self, catalog: Catalog):
+        self.catalog = catalog
+        self.set_index = SearchIndex((name, name) for name in catalog.sets)
+        try:
+            await db.sync_catalog(catalog)
+        except Exception:
+            logger.exception(f"Could not sync catalog {catalog.version} into the stats tables")
+            return
+        logger.info(f"Synced catalog {catalog.version} into the stats tables")
+
+    @timed(AUTOCOMPLETE_DURATION)
+    async def autocomplete_set_name(
+        self,
+        interaction: Interaction,
+        current: str,
+    ) -> list[app_commands.Choice[str]]:
+        return [
+            app_commands.Choice(name=label, value=name)
+            for label, name in self.set_index.search(current)
+        ]
+
+    @app_commands.command(name="leaderboard", description="See who leads the collection rankings.")
+    @app_commands.describe(
+        category="What to rank players by",
+        set_name="Rank by completion of one set instead",
+    )
+    @app_commands.choices(category=[
+        app_commands.Choice(name=title, value=key) for key, title in CATEGORY_TITLES.items()
+    ])
+    @app_commands.autocomplete(set_name=autocomplete_set_name)
+    @inject_log_context
+    @timed(COMMAND_DURATION)
+    async def leaderboard(
+        self,
+        interaction: Interaction,
+        category: str = "cards",
+        set_name: str | None = None,
+    ):
+        if set_name:
+            card_set = self.catalog.sets.get(set_name)
+            if card_set is None:
+                await interaction.response.send_message(f"⚠️ Unknown set **{set_name}**.", ephemeral=True)
+                return
+            set_size = len(self.catalog.by_set.get(set_name, ()))
+            rows = await db.get_set_leaderboard(card_set.id, LEADERBOARD_SIZE)
+            title = f"🏆 {set_name} completion"
+            lines = [
+                f"{_rank_label(i)} <@{discord_id}> — {owned}/{set_size} ({_percent(owned, set_size)})"
+                for i, (discord_id, owned) in enumerate(rows)
+            ]
+        else:
+            rows = await db.get_leaderboard(category, LEADERBOARD_SIZE)
+            title = f"🏆 {CATEGORY_TITLES[category]}"
+            lines = [
+                f"{_rank_label(i)} <@{discord_id}> — {value:,}"
+                for i, (discord_id, value) in enumerate(rows)
+            ]
+
+        embed = discord.Embed(
+            title=title,
+            description="\n".join(lines) or "Nobody has collected anything here yet.",
+            color=discord.Color.gold(),
+        )
+        await interaction.response.send_message(embed=embed)
+
+        logger.info(f"{interaction.user} viewed the leaderboard ({set_name or category})")
+
+    @app_commands.command(name="set_progress", description="See how close you are to completing each set.")
+    @app_commands.describe(user="Whose progress to show (defaults to you)")
+    @inject_log_context
+    @timed(COMMAND_DURATION)
+    async def set_progress(self, interaction: Interaction, user: Member | None = None):
+        member = user or interaction.user
+        progress = await db.get_set_progress(str(member.id))
+        if not progress:
+            await interaction.response.send_message(f"📭 {member.display_name} doesn't have any cards yet!")
+            return
+
+        lines = [
+            f"• **{p.name}** — {p.owned}/{p.card_count} ({_percent(p.owned, p.card_count)}) · rank #{p.rank}"
+            for p in progress[:MAX_SETS_SHOWN]
+        ]
+        if len(progress) > MAX_SETS_SHOWN:
+            lines.append(f"…and {len(progress) - MAX_SETS_SHOWN} more sets")
+
+        embed = discord.Embed(
+            title=f"📊 {member.display_name}'s set progress",
+            description="\n".join(lines),
+            color=discord.Color.blue(),
+        )
+        await interaction.response.send_message(embed=embed)
+
+        logger.info(f"{interaction.user} viewed set progress for {member}")
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(StatsCog(bot))
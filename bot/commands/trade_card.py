@@ -1,68 +1,92 @@
-import asyncio
-import json
 import logging
-from pathlib import Path
 
 import discord
 from discord import Interaction, app_commands, Member
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 from bot import db
-from bot.utils.logging_utils import inject_log_context, log_time
+from bot.catalog import Catalog, get_catalog
+from bot.search_index import filter_choices
+from bot.settings import config
+from bot.utils.logging_utils import inject_log_context
+from bot.utils.metrics import AUTOCOMPLETE_DURATION, COMMAND_DURATION, timed
 
 logger = logging.getLogger(__name__)
-DATA_DIR = Path("/app/data")
+
+ACCEPT, DECLINE = "✅", "❌"
 
 
 class TradeCardCog(commands.Cog):
+    """/trade_card and its offers.
+
+    Offers live in the trade_offers table until the target reacts or they
+    expire, so they survive restarts. One raw reaction listener resolves all of
+    them through the ``pending_offers`` set of message ids, and a background
+    sweep expires the rest every ``TRADE_SWEEP_INTERVAL`` seconds.
+    """
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        with open(DATA_DIR / "cards.json", encoding="utf-8") as f:
-            self.cards_data = json.load(f)
-        self.card_lookup = {card["id"]: card for card in self.cards_data}
-
-    def get_sets_for_user(self, discord_id: str) -> list[str]:
-        player_cards = db.get_cards(discord_id)
-        sets = set()
-        for card_id in player_cards:
-            card = self.card_lookup.get(card_id)
-            if card:
-                set_name = card.get("set", {}).get("name")
-                if set_name:
-                    sets.add(set_name)
-        return sorted(sets)
-
-    def get_cards_for_user_in_set(self, discord_id: str, set_name: str) -> list[str]:
-        player_cards = db.get_cards(discord_id)
-        cards = []
-        for card_id in player_cards:
-            card = self.card_lookup.get(card_id)
-            if card and card.get("set", {}).get("name") == set_name:
-                cards.append(card.get("name", "Unknown"))
-        return sorted(set(cards))
+        self.catalog = get_catalog()
+        self.card_lookup = self.catalog.by_id
+        self.pending_offers: set[int] = set()
+
+    async def cog_load(self):
+        self.pending_offers = await db.pending_trade_offer_ids()
+        self.sweep_offers.change_interval(seconds=config.trade_sweep_interval)
+        self.sweep_offers.start()
+
+    def cog_unload(self):
+        self.sweep_offers.cancel()
+
+    @commands.Cog.listener()
+    async def on_catalog_reload(self, catalog: Catalog):
+        self.catalog, self.card_lookup = catalog, catalog.by_id
+
+    async def get_sets_for_user(self, discord_id: str) -> list[str]:
+        inventory = await db.get_inventory(discord_id)
+        return inventory.set_names()
+
+    async def get_cards_for_user_in_set(self, discord_id: str, set_name: str) -> list[str]:
+        inventory = await db.get_inventory(discord_id)
+        return inventory.card_ids(set_name)
+
+    def card_choices(self, card_ids: list[str], current: str) -> list[app_commands.Choice[str]]:
+        # Values are card ids, so a printing picked here resolves exactly; the label
+        # shows the card number when the set has several cards with that name.
+        labels = (
+            (self.catalog.card_label(card), card.id)
+            for card in map(self.card_lookup.get, card_ids)
+            if card is not None
+        )
+        return [app_commands.Choice(name=label, value=value) for label, value in filter_choices(current, labels)]
 
+    @staticmethod
+    def set_choices(sets: list[str], current: str) -> list[app_commands.Choice[str]]:
+        return [
+            app_commands.Choice(name=label, value=value)
+            for label, value in filter_choices(current, ((s, s) for s in sets))
+        ]
+
+    @timed(AUTOCOMPLETE_DURATION)
     async def autocomplete_set(
         self, interaction: Interaction, current: str
     ) -> list[app_commands.Choice[str]]:
         user_id = str(interaction.user.id)
-        sets = self.get_sets_for_user(user_id)
-        return [
-            app_commands.Choice(name=s, value=s)
-            for s in sets if current.lower() in s.lower()
-        ][:25]
+        sets = await self.get_sets_for_user(user_id)
+        return self.set_choices(sets, current)
 
+    @timed(AUTOCOMPLETE_DURATION)
     async def autocomplete_card(
         self, interaction: Interaction, current: str
     ) -> list[app_commands.Choice[str]]:
         user_id = str(interaction.user.id)
         options = {opt["name"]: opt["value"] for opt in interaction.data.get("options", [])}
         selected_set = options.get("my_set") or ""
-        cards = self.get_cards_for_user_in_set(user_id, selected_set)
-        return [
-            app_commands.Choice(name=c, value=c)
-            for c in cards if current.lower() in c.lower()
-        ][:25]
+        cards = await self.get_cards_for_user_in_set(user_id, selected_set)
+        return self.card_choices(cards, current)
 
+    @timed(AUTOCOMPLETE_DURATION)
     async def autocomplete_their_set(
         self, interaction: Interaction, current: str
     ) -> list[app_commands.Choice[str]]:
@@ -72,12 +96,10 @@ class TradeCardCog(commands.Cog):
         if not target:
             return []
 
-        sets = self.get_sets_for_user(str(target))
-        return [
-            app_commands.Choice(name=s, value=s)
-            for s in sets if current.lower() in s.lower()
-        ][:25]
+        sets = await self.get_sets_for_user(str(target))
+        return self.set_choices(sets, current)
 
+    @timed(AUTOCOMPLETE_DURATION)
     async def autocomplete_their_card(
         self, interaction: Interaction, current: str
     ) -> list[app_commands.Choice[str]]:
@@ -88,11 +110,8 @@ class TradeCardCog(commands.Cog):
         if not target:
             return []
 
-        cards = self.get_cards_for_user_in_set(str(target), set_name)
-        return [
-            app_commands.Choice(name=c, value=c)
-            for c in cards if current.lower() in c.lower()
-        ][:25]
+        cards = await self.get_cards_for_user_in_set(str(target), set_name)
+        return self.card_choices(cards, current)
 
     @app_commands.command(name="trade_card", description="Trade a card with another user.")
     @app_commands.describe(
@@ -109,7 +128,7 @@ class TradeCardCog(commands.Cog):
         their_card=autocomplete_their_card,
     )
     @inject_log_context
-    @log_time(logger.info)
+    @timed(COMMAND_DURATION)
     async def trade_card(
         self,
         interaction: Interaction,
@@ -122,21 +141,20 @@ class TradeCardCog(commands.Cog):
         initiator_id = str(interaction.user.id)
         target_id = str(target_user.id)
 
-        my_card_id = next(
-            (c["id"] for c in self.cards_data if c["name"] == my_card and c["set"]["name"] == my_set),
-            None,
-        )
-        their_card_id = next(
-            (c["id"] for c in self.cards_data if c["name"] == their_card and c["set"]["name"] == their_set),
-            None,
-        )
+        my_card_data = self.catalog.resolve_card(my_set, my_card)
+        their_card_data = self.catalog.resolve_card(their_set, their_card)
 
-        if not my_card_id or not their_card_id:
-            await interaction.response.send_message("❌ Invalid card selection.", ephemeral=True)
+        if not my_card_data or not their_card_data:
+            await interaction.response.send_message(
+                "❌ Invalid card selection — pick the card from the suggestions.", ephemeral=True
+            )
             return
 
-        initiator_cards = db.get_cards(initiator_id)
-        target_cards = db.get_cards(target_id)
+        my_card_id, their_card_id = my_card_data.id, their_card_data.id
+        my_card, their_card = self.catalog.card_label(my_card_data), self.catalog.card_label(their_card_data)
+
+        initiator_cards = await db.get_cards(initiator_id)
+        target_cards = await db.get_cards(target_id)
         
         if initiator_cards.get(my_card_id, 0) < 1:
             await interaction.response.send_message("❌ You don't have that card.", ephemeral=True)
@@ -145,11 +163,8 @@ class TradeCardCog(commands.Cog):
             await interaction.response.send_message(f"❌ {target_user.display_name} doesn't have that card.", ephemeral=True)
             return
 
-        my_card_data = self.card_lookup.get(my_card_id)
-        their_card_data = self.card_lookup.get(their_card_id)
-
-        my_rarity = my_card_data.get("rarity", "Unknown") if my_card_data else "Unknown"
-        their_rarity = their_card_data.get("rarity", "Unknown") if their_card_data else "Unknown"
+        my_rarity = my_card_data.rarity or "Unknown"
+        their_rarity = their_card_data.rarity or "Unknown"
 
         embed = discord.Embed(
             title="🔁 Trade Request",
@@ -157,35 +172,78 @@ class TradeCardCog(commands.Cog):
                 f"**{interaction.user.display_name}** wants to trade with **{target_user.display_name}**!\n\n"
                 f"**You give:** {my_card} ({my_set}) — *{my_rarity}*\n"
                 f"**You get:** {their_card} ({their_set}) — *{their_rarity}*\n\n"
-                f"{target_user.mention}, react below to accept or reject."
+                f"{target_user.mention}, react below to accept or reject "
+                f"within {config.trade_offer_ttl} seconds."
             ),
             color=discord.Color.orange(),
         )
         await interaction.response.send_message(embed=embed)
         message = await interaction.original_response()
-        await message.add_reaction("✅")
-        await message.add_reaction("❌")
-
-        def check(reaction, user):
-            return (
-                user.id == target_user.id
-                and str(reaction.emoji) in {"✅", "❌"}
-                and reaction.message.id == message.id
+        offer = db.TradeOffer(message.id, message.channel.id, initiator_id, target_id, my_card_id, their_card_id)
+        await db.create_trade_offer(offer, config.trade_offer_ttl)
+        self.pending_offers.add(message.id)
+        await message.add_reaction(ACCEPT)
+        await message.add_reaction(DECLINE)
+        logger.info(f"{interaction.user} offered {my_card} to {target_user} for {their_card}")
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        # Sees every reaction in every guild: anything but a ✅/❌ on a pending
+        # offer is dropped with a set lookup, before touching the database.
+        if (
+            payload.message_id not in self.pending_offers
+            or str(payload.emoji) not in (ACCEPT, DECLINE)
+            or payload.user_id == self.bot.user.id
+        ):
+            return
+
+        # Only the target can claim the offer, and only once across replicas.
+        offer = await db.claim_trade_offer(payload.message_id, str(payload.user_id))
+        if offer is None:
+            return
+        self.pending_offers.discard(offer.message_id)
+        message = self.offer_message(offer)
+
+        if str(payload.emoji) == DECLINE:
+            await message.reply("❌ Trade declined.")
+            return
+        try:
+            await db.execute_trade(
+                offer.initiator_id, offer.target_id, {offer.give_card_id: 1}, {offer.get_card_id: 1}
             )
+        except ValueError:
+            logger.exception("Trade failed")
+            await message.reply("❌ Trade failed — one of the cards is no longer available.")
+            return
+        except Exception:
+            # The offer is already claimed, so nobody can retry it; say so rather than go quiet.
+            logger.exception(f"Trade {offer.message_id} failed")
+            await message.reply("❌ Trade failed — please try again with a new offer.")
+            return
+        await message.reply("✅ Trade completed!")
+        logger.info(
+            f"{offer.initiator_id} traded {offer.give_card_id} with {offer.target_id} for {offer.get_card_id}"
+        )
 
+    @tasks.loop(seconds=15)
+    async def sweep_offers(self):
         try:
-            reaction, _ = await self.bot.wait_for("reaction_add", timeout=60.0, check=check)
-            if str(reaction.emoji) == "✅":
-                db.remove_cards(initiator_id, {my_card_id: 1})
-                db.add_cards(target_id, {my_card_id: 1})
-                db.remove_cards(target_id, {their_card_id: 1})
-                db.add_cards(initiator_id, {their_card_id: 1})
-                await message.reply("✅ Trade completed!")
-                logger.info(f"{interaction.user} traded {my_card} with {target_user} for {their_card}")
-            else:
-                await message.reply("❌ Trade declined.")
-        except asyncio.TimeoutError:
-            await message.reply("⏱️ Trade timed out.")
+            expired = await db.expire_trade_offers()
+        except Exception:
+            # An unhandled error would stop the loop; try again next interval.
+            logger.exception("Trade offer sweep failed")
+            return
+        for offer in expired:
+            self.pending_offers.discard(offer.message_id)
+            try:
+                await self.offer_message(offer).reply("⏱️ Trade timed out.")
+            except discord.HTTPException:
+                logger.warning(f"Could not announce expired trade {offer.message_id}", exc_info=True)
+
+    def offer_message(self, offer: db.TradeOffer) -> discord.PartialMessage:
+        # Built from ids alone, so offers made before a restart can still be answered.
+        return self.bot.get_partial_messageable(offer.channel_id).get_partial_message(offer.message_id)
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(TradeCardCog(bot))
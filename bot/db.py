@@ -1,8 +1,18 @@
-import json
-from psycopg_pool import ConnectionPool
-from bot.settings import config 
+import logging
+from typing import NamedTuple
 
-DB_POOL = ConnectionPool(
+from psycopg import AsyncCursor, errors
+from psycopg_pool import AsyncConnectionPool
+from bot.catalog import Catalog
+from bot.inventory import INVENTORY_CACHE, Inventory
+from bot.packs import HIT_TIERS, rarity_tier
+from bot.settings import config
+from bot.utils.metrics import DB_DURATION, timed
+from bot.write_behind import Batch, WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+DB_POOL = AsyncConnectionPool(
     conninfo=(
         f"host={config.db_host} "
         f"port={config.db_port} "
@@ -12,82 +22,429 @@ DB_POOL = ConnectionPool(
     ),
     min_size=1,
     max_size=10,
+    open=False,
 )
 
-def get_cards(discord_id: str) -> dict[str, int]:
-    with DB_POOL.connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT cards FROM player_cards WHERE discord_id = %s",
+async def open_pool() -> None:
+    await DB_POOL.open(wait=True)
+    if WRITE_BEHIND is not None:
+        WRITE_BEHIND.start()
+
+async def close_pool() -> None:
+    """Write any buffered pack rewards, then close the pool."""
+    try:
+        if WRITE_BEHIND is not None:
+            await WRITE_BEHIND.close()
+    finally:
+        await DB_POOL.close()
+
+def _split(cards: dict[str, int]) -> tuple[list[str], list[int]]:
+    # Sorted so concurrent writers always lock rows in the same order.
+    items = sorted(cards.items())
+    return [card_id for card_id, _ in items], [count for _, count in items]
+
+async def _lock_players(cur: AsyncCursor, *discord_ids: str) -> None:
+    # Every write to a player's inventory (and, through the stats triggers, to
+    # their player_stats rows) takes their lock first, in a fixed order, so
+    # concurrent writers queue instead of deadlocking.
+    for discord_id in sorted(set(discord_ids)):
+        await cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (discord_id,))
+
+async def _add(cur: AsyncCursor, discord_id: str, cards: dict[str, int]) -> dict[str, int]:
+    """Returns the new quantity of each added card."""
+    card_ids, counts = _split(cards)
+    await cur.execute(
+        """
+        INSERT INTO player_card_inventory (discord_id, card_id, qty)
+        SELECT %s, d.card_id, d.qty
+        FROM unnest(%s::text[], %s::int[]) AS d(card_id, qty)
+        ON CONFLICT (discord_id, card_id) DO UPDATE
+        SET qty = player_card_inventory.qty + EXCLUDED.qty
+        RETURNING card_id, qty
+        """,
+        (discord_id, card_ids, counts),
+    )
+    return dict(await cur.fetchall())
+
+async def _remove(cur: AsyncCursor, discord_id: str, cards: dict[str, int]) -> dict[str, int]:
+    """Returns the new quantity of each removed card."""
+    card_ids, counts = _split(cards)
+    try:
+        await cur.execute(
+            """
+            UPDATE player_card_inventory AS inv
+            SET qty = inv.qty - d.qty
+            FROM unnest(%s::text[], %s::int[]) AS d(card_id, qty)
+            WHERE inv.discord_id = %s AND inv.card_id = d.card_id
+            RETURNING inv.card_id, inv.qty
+            """,
+            (card_ids, counts, discord_id),
+        )
+    except errors.CheckViolation as e:
+        raise ValueError(f"User {discord_id} does not have enough cards to remove {cards}") from e
+
+    updated = dict(await cur.fetchall())
+    missing = [card_id for card_id in card_ids if card_id not in updated]
+    if missing:
+        raise ValueError(f"User does not own card: {missing[0]}")
+    return updated
+
+async def _patch_cache(discord_id: str, quantities: dict[str, int]) -> None:
+    # Runs after the write has committed, so it must not raise: a cache that
+    # can't be patched is dropped and rebuilt from the database on next read.
+    # ``quantities`` are committed totals; rewards still buffered are not in them
+    # yet but are already in the cached collection, so keep them on top.
+    try:
+        if WRITE_BEHIND is not None:
+            for card_id, qty in WRITE_BEHIND.pending(discord_id).items():
+                if card_id in quantities:
+                    quantities[card_id] += qty
+        await INVENTORY_CACHE.apply(discord_id, quantities)
+    except Exception:
+        logger.exception(f"Inventory cache patch failed for {discord_id}; invalidating it")
+        await INVENTORY_CACHE.invalidate(discord_id)
+
+async def _select_cards(discord_id: str) -> dict[str, int]:
+    async with DB_POOL.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT card_id, qty FROM player_card_inventory WHERE discord_id = %s AND qty > 0",
                 (discord_id,),
             )
-            row = cur.fetchone()
-            return row[0] if row else {}
-
-def add_cards(discord_id: str, cards_to_add: dict[str, int]) -> None:
-    with DB_POOL.connection() as conn:
-        with conn.transaction():
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT pg_advisory_xact_lock(hashtext(%s))",
-                    (discord_id,),
-                )
+            return {card_id: qty for card_id, qty in await cur.fetchall()}
 
-                cur.execute(
-                    "SELECT cards FROM player_cards WHERE discord_id = %s",
-                    (discord_id,),
-                )
-                row = cur.fetchone()
-                current_cards: dict[str, int] = row[0] if row else {}
+@timed(DB_DURATION)
+async def get_cards(discord_id: str) -> dict[str, int]:
+    """The player's collection, including rewards still in the write-behind buffer."""
+    if WRITE_BEHIND is None:
+        return await _select_cards(discord_id)
+    async with WRITE_BEHIND.reading():
+        cards = await _select_cards(discord_id)
+        for card_id, qty in WRITE_BEHIND.pending(discord_id).items():
+            cards[card_id] = cards.get(card_id, 0) + qty
+    return cards
+
+@timed(DB_DURATION)
+async def get_inventory(discord_id: str) -> Inventory:
+    """Cached collection and its grouped view.
+
+    Writes through this module patch the cache with the new quantities, buffered
+    rewards included, and a load that raced a write is not cached. With the
+    local backend, writes made on another replica still show up only once the
+    entry expires, up to the cache TTL later. Use get_cards where that matters,
+    e.g. before a trade.
+    """
+    inventory = await INVENTORY_CACHE.get(discord_id)
+    if inventory is None:
+        # Taken before the load, so a write committing during it voids the fill.
+        version = await INVENTORY_CACHE.version(discord_id)
+        inventory = Inventory(await get_cards(discord_id))
+        await INVENTORY_CACHE.set(discord_id, inventory, version)
+    return inventory
 
-                for card_id, count in cards_to_add.items():
-                    current_cards[card_id] = current_cards.get(card_id, 0) + count
+@timed(DB_DURATION)
+async def add_cards(discord_id: str, cards_to_add: dict[str, int]) -> None:
+    async with DB_POOL.connection() as conn:
+        async with conn.transaction():
+            async with conn.cursor() as cur:
+                await _lock_players(cur, discord_id)
+                quantities = await _add(cur, discord_id, cards_to_add)
+    await _patch_cache(discord_id, quantities)
 
-                cur.execute(
+@timed(DB_DURATION)
+async def remove_cards(discord_id: str, cards_to_remove: dict[str, int]) -> None:
+    await _flush_rewards(discord_id)
+    async with DB_POOL.connection() as conn:
+        async with conn.transaction():
+            async with conn.cursor() as cur:
+                await _lock_players(cur, discord_id)
+                quantities = await _remove(cur, discord_id, cards_to_remove)
+    await _patch_cache(discord_id, quantities)
+
+@timed(DB_DURATION)
+async def execute_trade(
+    a: str, b: str, give: dict[str, int], get: dict[str, int]
+) -> None:
+    """Move ``give`` from ``a`` to ``b`` and ``get`` from ``b`` to ``a`` in one transaction."""
+    await _flush_rewards(a, b)
+    async with DB_POOL.connection() as conn:
+        async with conn.transaction():
+            async with conn.cursor() as cur:
+                await _lock_players(cur, a, b)
+                # Shared dict when a == b, so later quantities win in write order.
+                quantities: dict[str, dict[str, int]] = {a: {}, b: {}}
+                quantities[a].update(await _remove(cur, a, give))
+                quantities[b].update(await _remove(cur, b, get))
+                quantities[b].update(await _add(cur, b, give))
+                quantities[a].update(await _add(cur, a, get))
+    for discord_id, updated in quantities.items():
+        await _patch_cache(discord_id, updated)
+
+# Write-behind for pack rewards: with WRITE_BEHIND_ENABLED, reward_cards only
+# buffers the grant and patches the cached collection; the buffer writes all
+# players' grants every WRITE_BEHIND_INTERVAL_MS in one statement. Removals and
+# trades write a player's buffered grants first, so they check real totals.
+
+@timed(DB_DURATION)
+async def _write_rewards(batch: Batch) -> None:
+    rows = sorted((discord_id, card_id, qty) for discord_id, cards in batch.items() for card_id, qty in cards.items())
+    async with DB_POOL.connection() as conn:
+        async with conn.transaction():
+            async with conn.cursor() as cur:
+                # Same lock order as _lock_players, in one round trip.
+                await cur.execute(
+                    "SELECT pg_advisory_xact_lock(hashtext(id)) FROM unnest(%s::text[]) AS id ORDER BY id",
+                    (sorted(batch),),
+                )
+                await cur.execute(
                     """
-                    INSERT INTO player_cards (discord_id, cards)
-                    VALUES (%s, %s)
-                    ON CONFLICT (discord_id) DO UPDATE
-                    SET cards = EXCLUDED.cards
+                    INSERT INTO player_card_inventory (discord_id, card_id, qty)
+                    SELECT * FROM unnest(%s::text[], %s::text[], %s::int[])
+                    ON CONFLICT (discord_id, card_id) DO UPDATE
+                    SET qty = player_card_inventory.qty + EXCLUDED.qty
+                    RETURNING discord_id, card_id, qty
                     """,
-                    (discord_id, json.dumps(current_cards)),
+                    ([r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows]),
                 )
+                updated = await cur.fetchall()
 
-def remove_cards(discord_id: str, cards_to_remove: dict[str, int]) -> None:
-    with DB_POOL.connection() as conn:
-        with conn.transaction():
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT pg_advisory_xact_lock(hashtext(%s))",
-                    (discord_id,),
-                )
+    # Committed: from here on nothing may raise, or the buffer would write the batch again.
+    quantities: dict[str, dict[str, int]] = {}
+    for discord_id, card_id, qty in updated:
+        quantities.setdefault(discord_id, {})[card_id] = qty
+    for discord_id, totals in quantities.items():
+        try:
+            await _patch_cache(discord_id, totals)
+        except Exception:
+            logger.exception(f"Rewards for {discord_id} were written but their cache patch failed")
+
+WRITE_BEHIND = (
+    WriteBehindBuffer(
+        _write_rewards,
+        interval=config.write_behind_interval_ms / 1000,
+        max_cards=config.write_behind_max_cards,
+    )
+    if config.write_behind_enabled
+    else None
+)
+
+async def _flush_rewards(*discord_ids: str) -> None:
+    if WRITE_BEHIND is not None and WRITE_BEHIND.has_pending(*discord_ids):
+        await WRITE_BEHIND.flush()
+
+async def reward_cards(discord_id: str, cards: dict[str, int]) -> None:
+    """Grant pack rewards: buffered when write-behind is enabled, otherwise add_cards.
+
+    Once the buffer is closed for shutdown, rewards are written directly.
+    """
+    if WRITE_BEHIND is None or WRITE_BEHIND.closed:
+        await add_cards(discord_id, cards)
+        return
+    WRITE_BEHIND.add(discord_id, cards)
+    # A delta, applied atomically, so concurrent grants can't overwrite each other's totals.
+    try:
+        await INVENTORY_CACHE.add(discord_id, cards)
+    except Exception:
+        logger.exception(f"Inventory cache update failed for {discord_id}; invalidating it")
+        await INVENTORY_CACHE.invalidate(discord_id)
+
+
+class TradeOffer(NamedTuple):
+    message_id: int
+    channel_id: int
+    initiator_id: str
+    target_id: str
+    give_card_id: str
+    get_card_id: str
+
+# trade_offers only holds pending offers: accepting, declining and expiring all
+# DELETE ... RETURNING the row, so exactly one caller (on any replica) wins it.
 
-                cur.execute(
-                    "SELECT cards FROM player_cards WHERE discord_id = %s",
-                    (discord_id,),
+@timed(DB_DURATION)
+async def create_trade_offer(offer: TradeOffer, ttl: float) -> None:
+    async with DB_POOL.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                INSERT INTO trade_offers
+                    (message_id, channel_id, initiator_id, target_id, give_card_id, get_card_id, expires_at)
+                VALUES (%s, %s, %s, %s, %s, %s, now() + make_interval(secs => %s))
+                """,
+                (*offer, ttl),
+            )
+
+@timed(DB_DURATION)
+async def pending_trade_offer_ids() -> set[int]:
+    async with DB_POOL.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT message_id FROM trade_offers WHERE expires_at > now()")
+            return {message_id for message_id, in await cur.fetchall()}
+
+@timed(DB_DURATION)
+async def claim_trade_offer(message_id: int, target_id: str) -> TradeOffer | None:
+    """Remove and return the offer if it is still pending and addressed to ``target_id``."""
+    async with DB_POOL.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                DELETE FROM trade_offers
+                WHERE message_id = %s AND target_id = %s AND expires_at > now()
+                RETURNING message_id, channel_id, initiator_id, target_id, give_card_id, get_card_id
+                """,
+                (message_id, target_id),
+            )
+            row = await cur.fetchone()
+    return TradeOffer(*row) if row else None
+
+@timed(DB_DURATION)
+async def expire_trade_offers() -> list[TradeOffer]:
+    async with DB_POOL.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                DELETE FROM trade_offers
+                WHERE expires_at <= now()
+                RETURNING message_id, channel_id, initiator_id, target_id, give_card_id, get_card_id
+                """
+            )
+            return [TradeOffer(*row) for row in await cur.fetchall()]
+
+# Collection stats: card_set / catalog_card mirror the catalog, and triggers on
+# player_card_inventory keep player_stats / player_set_progress current.
+
+LEADERBOARD_COLUMNS = {
+    "cards": "total_cards",
+    "unique": "unique_cards",
+    "hits": "hit_cards",
+}
+
+class SetProgress(NamedTuple):
+    set_id: str
+    name: str
+    owned: int
+    card_count: int
+    rank: int
+
+@timed(DB_DURATION)
+async def sync_catalog(catalog: Catalog) -> bool:
+    """Mirror the catalog into card_set / catalog_card and rebuild the stats if it changed.
+
+    Returns whether anything was written. Safe to call from every replica at once.
+    """
+    sets = {s.id: s for s in catalog.sets.values()}
+    sets.update((card.set.id, card.set) for card in catalog.cards)
+    card_counts = {set_id: 0 for set_id in sets}
+    for card in catalog.cards:
+        card_counts[card.set.id] += 1
+
+    async with DB_POOL.connection() as conn:
+        async with conn.transaction():
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT pg_advisory_xact_lock(hashtext('catalog_sync'))")
+                await cur.execute("SELECT version FROM catalog_version")
+                row = await cur.fetchone()
+                if row and row[0] == catalog.version:
+                    return False
+
+                await cur.execute(
+                    """
+                    INSERT INTO card_set (set_id, name, series, release_date, card_count)
+                    SELECT * FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[], %s::int[])
+                    ON CONFLICT (set_id) DO UPDATE SET
+                        name = EXCLUDED.name,
+                        series = EXCLUDED.series,
+                        release_date = EXCLUDED.release_date,
+                        card_count = EXCLUDED.card_count
+                    """,
+                    (
+                        list(sets),
+                        [s.name for s in sets.values()],
+                        [s.series for s in sets.values()],
+                        [s.release_date for s in sets.values()],
+                        [card_counts[set_id] for set_id in sets],
+                    ),
                 )
-                row = cur.fetchone()
-                current_cards: dict[str, int] = row[0] if row else {}
-
-                for card_id, count in cards_to_remove.items():
-                    if card_id not in current_cards:
-                        raise ValueError(f"User does not own card: {card_id}")
-                    if current_cards[card_id] < count:
-                        raise ValueError(
-                            f"User has only {current_cards[card_id]} of card {card_id}, "
-                            f"cannot remove {count}"
-                        )
-
-                    current_cards[card_id] -= count
-                    if current_cards[card_id] == 0:
-                        del current_cards[card_id]
-
-                cur.execute(
+                tiers = [rarity_tier(card) for card in catalog.cards]
+                await cur.execute(
                     """
-                    INSERT INTO player_cards (discord_id, cards)
-                    VALUES (%s, %s)
-                    ON CONFLICT (discord_id) DO UPDATE
-                    SET cards = EXCLUDED.cards
+                    INSERT INTO catalog_card (card_id, set_id, name, rarity, rarity_tier, is_hit)
+                    SELECT * FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[], %s::text[], %s::bool[])
+                    ON CONFLICT (card_id) DO UPDATE SET
+                        set_id = EXCLUDED.set_id,
+                        name = EXCLUDED.name,
+                        rarity = EXCLUDED.rarity,
+                        rarity_tier = EXCLUDED.rarity_tier,
+                        is_hit = EXCLUDED.is_hit
                     """,
-                    (discord_id, json.dumps(current_cards)),
+                    (
+                        [card.id for card in catalog.cards],
+                        [card.set.id for card in catalog.cards],
+                        [card.name for card in catalog.cards],
+                        [card.rarity for card in catalog.cards],
+                        tiers,
+                        [tier in HIT_TIERS for tier in tiers],
+                    ),
+                )
+                await cur.execute(
+                    "DELETE FROM catalog_card WHERE card_id <> ALL(%s::text[])",
+                    ([card.id for card in catalog.cards],),
                 )
+                await cur.execute("DELETE FROM card_set WHERE set_id <> ALL(%s::text[])", (list(sets),))
+                await cur.execute("SELECT rebuild_collection_stats()")
+                await cur.execute(
+                    """
+                    INSERT INTO catalog_version (version) VALUES (%s)
+                    ON CONFLICT (singleton) DO UPDATE SET version = EXCLUDED.version
+                    """,
+                    (catalog.version,),
+                )
+    return True
+
+@timed(DB_DURATION)
+async def get_leaderboard(category: str, limit: int = 10) -> list[tuple[str, int]]:
+    """Top ``(discord_id, value)`` pairs for a LEADERBOARD_COLUMNS category."""
+    column = LEADERBOARD_COLUMNS[category]
+    async with DB_POOL.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                f"SELECT discord_id, {column} FROM player_stats WHERE {column} > 0 "
+                f"ORDER BY {column} DESC, discord_id LIMIT %s",
+                (limit,),
+            )
+            return await cur.fetchall()
+
+@timed(DB_DURATION)
+async def get_set_leaderboard(set_id: str, limit: int = 10) -> list[tuple[str, int]]:
+    async with DB_POOL.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT discord_id, owned_unique FROM player_set_progress
+                WHERE set_id = %s AND owned_unique > 0
+                ORDER BY owned_unique DESC, discord_id LIMIT %s
+                """,
+                (set_id, limit),
+            )
+            return await cur.fetchall()
+
+@timed(DB_DURATION)
+async def get_set_progress(discord_id: str) -> list[SetProgress]:
+    """The player's progress in every set they own cards from, most complete first.
+
+    ``rank`` is their position among everyone collecting that set.
+    """
+    async with DB_POOL.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT p.set_id, s.name, p.owned_unique, s.card_count,
+                       (SELECT COUNT(*) + 1 FROM player_set_progress o
+                        WHERE o.set_id = p.set_id AND o.owned_unique > p.owned_unique)
+                FROM player_set_progress p
+                JOIN card_set s ON s.set_id = p.set_id
+                WHERE p.discord_id = %s AND p.owned_unique > 0
+                ORDER BY p.owned_unique::float / GREATEST(s.card_count, 1) DESC, s.name
+                """,
+                (discord_id,),
+            )
+            return [SetProgress(*row) for row in await cur.fetchall()]
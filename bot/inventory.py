@@ -0,0 +1,406 @@
+import json
+import logging
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from bot.catalog import Card, get_catalog
+from bot.settings import config
+from bot.utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+RARITY_ORDER = {
+    "Common": 0,
+    "Uncommon": 1,
+    "Rare": 2,
+}
+
+
+class _SetGroup:
+    """One set's owned cards, kept sorted for autocomplete and for /show_cards."""
+
+    __slots__ = ("header", "names", "entries", "lines")
+
+    def __init__(self, set_name: str):
+        self.header = f"📦 **{set_name}**"
+        self.names: list[tuple[str, str]] = []  # (name, card_id)
+        self.entries: list[tuple[int, str, str, str]] = []  # (rank, rarity, name, card_id)
+        self.lines: list[str] = []  # rendered entries, parallel to ``entries``
+
+    def add(self, card: Card, qty: int) -> None:
+        insort(self.names, (card.name, card.id))
+        entry = _entry(card)
+        i = bisect_left(self.entries, entry)
+        self.entries.insert(i, entry)
+        self.lines.insert(i, _line(entry, qty))
+
+    def remove(self, card: Card) -> None:
+        i = _index(self.names, (card.name, card.id))
+        if i is not None:
+            del self.names[i]
+        i = _index(self.entries, _entry(card))
+        if i is not None:
+            del self.entries[i]
+            del self.lines[i]
+
+    def update(self, card: Card, qty: int) -> None:
+        entry = _entry(card)
+        i = _index(self.entries, entry)
+        if i is None:
+            self.add(card, qty)
+        else:
+            self.lines[i] = _line(entry, qty)
+
+
+def _index(items: list[tuple], item: tuple) -> int | None:
+    """Position of ``item`` in sorted ``items``, or None if it isn't there."""
+    i = bisect_left(items, item)
+    return i if i < len(items) and items[i] == item else None
+
+
+def _entry(card: Card) -> tuple[int, str, str, str]:
+    rarity = card.rarity or "Unknown"
+    return RARITY_ORDER.get(rarity, 99), rarity, card.name, card.id
+
+
+def _line(entry: tuple[int, str, str, str], qty: int) -> str:
+    _, rarity, name, _ = entry
+    return f"• {name} — {rarity} — x{qty}"
+
+
+class Inventory:
+    """A player's collection plus its sorted, per-set grouped view.
+
+    The view backs both autocomplete (owned cards per set) and /show_cards
+    (rendered lines sorted by rarity, then name). ``apply`` patches it in place
+    after a write instead of rebuilding it from the whole collection. The view
+    belongs to the catalog it was built from; caches drop it once that catalog
+    has been replaced.
+    """
+
+    __slots__ = ("cards", "catalog", "groups", "_set_names")
+
+    def __init__(self, cards: dict[str, int]):
+        self.cards = cards
+        self.catalog = get_catalog()
+        self.groups: dict[str, _SetGroup] = {}
+        self._set_names: list[str] = []
+
+        card_lookup = self.catalog.by_id
+        for card_id, qty in cards.items():
+            card = card_lookup.get(card_id)
+            if card:
+                self._group(card.set.name).add(card, qty)
+
+    def _group(self, set_name: str) -> _SetGroup:
+        group = self.groups.get(set_name)
+        if group is None:
+            group = self.groups[set_name] = _SetGroup(set_name)
+            insort(self._set_names, set_name)
+        return group
+
+    def apply(self, quantities: dict[str, int]) -> None:
+        """Set the new total quantity of each card; zero or less removes it.
+
+        Totals rather than deltas, so applying the same write twice (or after
+        a reload that already saw it) leaves the view correct.
+        """
+        # The catalog the view was built from, so a card's entry is found where
+        # it was inserted even if a reload has since renamed or re-rarified it.
+        card_lookup = self.catalog.by_id
+        for card_id, qty in quantities.items():
+            old = self.cards.pop(card_id, 0)
+            if qty > 0:
+                self.cards[card_id] = qty
+            card = card_lookup.get(card_id)
+            if card is None or old == qty:
+                continue
+            set_name = card.set.name
+            if old <= 0:
+                self._group(set_name).add(card, qty)
+            elif qty <= 0:
+                group = self._group(set_name)
+                group.remove(card)
+                if not group.entries:
+                    del self.groups[set_name]
+                    del self._set_names[bisect_left(self._set_names, set_name)]
+            else:
+                self._group(set_name).update(card, qty)
+
+    def set_names(self) -> list[str]:
+        return list(self._set_names)
+
+    def card_ids(self, set_name: str) -> list[str]:
+        """Owned card ids in ``set_name``, ordered by card name."""
+        group = self.groups.get(set_name)
+        if group is None:
+            return []
+        return [card_id for _, card_id in group.names]
+
+    def lines(self, set_name: str | None = None) -> list[str]:
+        """Set headers, each followed by its cards' lines, for DeckView to paginate."""
+        set_names = [set_name] if set_name else self._set_names
+        lines: list[str] = []
+        for name in set_names:
+            group = self.groups.get(name)
+            if group is not None:
+                lines.append(group.header)
+                lines.extend(group.lines)
+        return lines
+
+
+class LocalInventoryCache:
+    """Per-replica cache of built inventories.
+
+    A fill takes ``version()`` before loading from the database and hands it
+    to ``set``, which drops the fill if a write for that player landed in the
+    meantime: the write found nothing cached to patch, so storing the load
+    would keep the pre-write snapshot for the whole TTL.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 10_000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, Inventory]] = OrderedDict()
+        self._seq = 0
+        # discord_id -> (seq, monotonic time) of its last write, oldest first.
+        # Only writes from the last ``ttl`` seconds are kept; fills older than
+        # that are never stored.
+        self._writes: OrderedDict[str, tuple[int, float]] = OrderedDict()
+
+    def _written(self, discord_id: str) -> None:
+        self._seq += 1
+        now = time.monotonic()
+        self._writes[discord_id] = (self._seq, now)
+        self._writes.move_to_end(discord_id)
+        while next(iter(self._writes.values()))[1] < now - self.ttl:
+            self._writes.popitem(last=False)
+
+    async def get(self, discord_id: str) -> Inventory | None:
+        entry = self._entries.get(discord_id)
+        if entry is None:
+            return None
+        expires_at, inventory = entry
+        if expires_at < time.monotonic() or inventory.catalog is not get_catalog():
+            del self._entries[discord_id]
+            return None
+        self._entries.move_to_end(discord_id)
+        return inventory
+
+    async def version(self, discord_id: str) -> tuple[int, float]:
+        return self._seq, time.monotonic()
+
+    async def set(self, discord_id: str, inventory: Inventory, version: tuple[int, float]) -> None:
+        seq, loaded_at = version
+        now = time.monotonic()
+        written = self._writes.get(discord_id)
+        if now - loaded_at > self.ttl or (written is not None and written[0] > seq):
+            return
+        self._entries[discord_id] = (now + self.ttl, inventory)
+        self._entries.move_to_end(discord_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def apply(self, discord_id: str, quantities: dict[str, int]) -> None:
+        self._written(discord_id)
+        entry = self._entries.get(discord_id)
+        if entry is not None:
+            entry[1].apply(quantities)
+
+    async def add(self, discord_id: str, cards: dict[str, int]) -> None:
+        """Add ``cards`` to the cached collection, if it is cached."""
+        self._written(discord_id)
+        entry = self._entries.get(discord_id)
+        if entry is not None:
+            inventory = entry[1]
+            inventory.apply({card_id: inventory.cards.get(card_id, 0) + qty for card_id, qty in cards.items()})
+
+    async def invalidate(self, discord_id: str) -> None:
+        self._written(discord_id)
+        self._entries.pop(discord_id, None)
+
+
+# Every write bumps the player's version key (KEYS[2]) to a fresh number from
+# the shared counter (KEYS[3]), whether or not the collection is cached, and
+# keeps it for ARGV[1] seconds; a fill only stores its load if the version is
+# still the one it read first (_SET).
+
+# KEYS[1] = cached collection, KEYS[2] = version, KEYS[3] = counter,
+# ARGV = ttl, card_id, qty, card_id, qty, ...
+# Patches the cached JSON in place (keeping its TTL) if it is still cached.
+_APPLY = """
+redis.call('SET', KEYS[2], redis.call('INCR', KEYS[3]), 'EX', ARGV[1])
+local raw = redis.call('GET', KEYS[1])
+if not raw then
+  return 0
+end
+local cards = cjson.decode(raw)
+for i = 2, #ARGV, 2 do
+  local qty = tonumber(ARGV[i + 1])
+  if qty > 0 then
+    cards[ARGV[i]] = qty
+  else
+    cards[ARGV[i]] = nil
+  end
+end
+redis.call('SET', KEYS[1], cjson.encode(cards), 'KEEPTTL')
+return 1
+"""
+
+# Same keys and arguments as _APPLY, but adds each qty to the cached one in the same step.
+_ADD = """
+redis.call('SET', KEYS[2], redis.call('INCR', KEYS[3]), 'EX', ARGV[1])
+local raw = redis.call('GET', KEYS[1])
+if not raw then
+  return 0
+end
+local cards = cjson.decode(raw)
+for i = 2, #ARGV, 2 do
+  local qty = (cards[ARGV[i]] or 0) + tonumber(ARGV[i + 1])
+  if qty > 0 then
+    cards[ARGV[i]] = qty
+  else
+    cards[ARGV[i]] = nil
+  end
+end
+redis.call('SET', KEYS[1], cjson.encode(cards), 'KEEPTTL')
+return 1
+"""
+
+# Same keys as _APPLY; ARGV = ttl.
+_INVALIDATE = """
+redis.call('SET', KEYS[2], redis.call('INCR', KEYS[3]), 'EX', ARGV[1])
+return redis.call('DEL', KEYS[1])
+"""
+
+# Same keys as _APPLY; ARGV = ttl, collection JSON, version the fill read ('' for none).
+# Gives the collection a version if it has none, and keeps the version at least
+# as long as the collection so every cached collection has one.
+_SET = """
+local version = redis.call('GET', KEYS[2]) or ''
+if version ~= ARGV[3] then
+  return 0
+end
+if version == '' then
+  redis.call('SET', KEYS[2], redis.call('INCR', KEYS[3]), 'EX', ARGV[1])
+else
+  redis.call('EXPIRE', KEYS[2], ARGV[1])
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[1])
+return 1
+"""
+
+# KEYS = collection, version; ARGV = version of the view the caller already built.
+# Returns {version, collection JSON, 1 if the caller's view is still current};
+# the JSON is left out ('') when the view is current, and '' means "not cached".
+_GET = """
+local version = redis.call('GET', KEYS[2]) or ''
+if version ~= '' and version == ARGV[1] and redis.call('EXISTS', KEYS[1]) == 1 then
+  return {version, '', 1}
+end
+return {version, redis.call('GET', KEYS[1]) or '', 0}
+"""
+
+
+class RedisInventoryCache:
+    """Shares cached collections between replicas; each builds the grouped view locally.
+
+    Built views are kept in a local LRU under the collection's version, so
+    repeated reads (every autocomplete keystroke) reuse the sorted view and
+    only rebuild it after a write, from any replica, has bumped the version.
+    """
+
+    COUNTER = "inventory:version_seq"
+
+    def __init__(self, redis: Redis, ttl: int, max_views: int = 10_000):
+        self.redis = redis
+        self.ttl = ttl
+        self.max_views = max_views
+        self._views: OrderedDict[str, tuple[str, Inventory]] = OrderedDict()
+        self._get = redis.register_script(_GET)
+        self._apply = redis.register_script(_APPLY)
+        self._add = redis.register_script(_ADD)
+        self._invalidate = redis.register_script(_INVALIDATE)
+        self._set = redis.register_script(_SET)
+
+    @staticmethod
+    def _key(discord_id: str) -> str:
+        return f"inventory:{discord_id}"
+
+    def _keys(self, discord_id: str) -> list[str]:
+        return [self._key(discord_id), f"{self._key(discord_id)}:version", self.COUNTER]
+
+    async def get(self, discord_id: str) -> Inventory | None:
+        view = self._views.get(discord_id)
+        if view is not None and view[1].catalog is not get_catalog():
+            view = None
+        try:
+            version, raw, current = await self._get(
+                keys=self._keys(discord_id)[:2], args=[view[0] if view else ""]
+            )
+        except RedisError:
+            logger.warning("Inventory cache read failed", exc_info=True)
+            return None
+        if current:
+            self._views.move_to_end(discord_id)
+            return view[1]
+        if not raw:
+            self._views.pop(discord_id, None)
+            return None
+        # cjson may write an emptied collection as [] rather than {}.
+        inventory = Inventory(json.loads(raw) or {})
+        if version:
+            self._views[discord_id] = (version, inventory)
+            self._views.move_to_end(discord_id)
+            while len(self._views) > self.max_views:
+                self._views.popitem(last=False)
+        return inventory
+
+    async def version(self, discord_id: str) -> str | None:
+        """The player's write version, "" if none is recent; None if Redis can't say."""
+        try:
+            return await self.redis.get(self._keys(discord_id)[1]) or ""
+        except RedisError:
+            logger.warning("Inventory cache version read failed", exc_info=True)
+            return None
+
+    async def set(self, discord_id: str, inventory: Inventory, version: str | None) -> None:
+        if version is None:
+            return
+        try:
+            await self._set(keys=self._keys(discord_id), args=[self.ttl, json.dumps(inventory.cards), version])
+        except RedisError:
+            logger.warning("Inventory cache write failed", exc_info=True)
+
+    async def apply(self, discord_id: str, quantities: dict[str, int]) -> None:
+        await self._patch(self._apply, discord_id, quantities)
+
+    async def add(self, discord_id: str, cards: dict[str, int]) -> None:
+        await self._patch(self._add, discord_id, cards)
+
+    async def _patch(self, script, discord_id: str, quantities: dict[str, int]) -> None:
+        args = [self.ttl, *(value for item in quantities.items() for value in item)]
+        try:
+            await script(keys=self._keys(discord_id), args=args)
+        except RedisError:
+            logger.warning("Inventory cache update failed", exc_info=True)
+            await self.invalidate(discord_id)
+
+    async def invalidate(self, discord_id: str) -> None:
+        try:
+            await self._invalidate(keys=self._keys(discord_id), args=[self.ttl])
+        except RedisError:
+            logger.warning("Inventory cache invalidation failed", exc_info=True)
+
+
+def _build_cache() -> LocalInventoryCache | RedisInventoryCache:
+    if config.inventory_cache_backend == "redis":
+        return RedisInventoryCache(redis_client, config.inventory_cache_ttl)
+    return LocalInventoryCache(config.inventory_cache_ttl)
+
+
+INVENTORY_CACHE = _build_cache()
@@ -0,0 +1,181 @@
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+
+from bot.catalog import Card, Catalog
+from bot.utils.sampling import AliasTable
+
+RARITY_TIERS = {
+    "common": {
+        "names": {"common"},
+        "weight": 60,
+    },
+    "uncommon": {
+        "names": {"uncommon"},
+        "weight": 25,
+    },
+    "rare": {
+        "names": {
+            "rare",
+            "rare holo",
+            "rare ace",
+            "rare break",
+            "rare prism star",
+            "rare shining",
+            "rare shiny",
+            "rare holo star",
+            "trainer gallery rare holo",
+            "black white rare",
+            "legend",
+            "rare prime",
+            "illustration rare",
+        },
+        "weight": 10,
+    },
+    "ultra_rare": {
+        "names": {
+            "rare holo ex",
+            "rare holo gx",
+            "rare holo lv.x",
+            "rare holo v",
+            "rare holo vmax",
+            "rare holo vstar",
+            "ultra rare",
+            "double rare",
+            "rare ultra",
+            "shiny rare",
+            "amazing rare",
+            "radiant rare",
+            "classic collection",
+            "ace spec rare",
+            "promo",
+        },
+        "weight": 4,
+    },
+    "secret_rare": {
+        "names": {
+            "rare shiny gx",
+            "rare rainbow",
+            "rare secret",
+            "shiny ultra rare",
+            "special illustration rare",
+            "hyper rare",
+        },
+        "weight": 1,
+    },
+}
+
+RARE_SLOT_TIERS = ("rare", "ultra_rare", "secret_rare")
+HIT_TIERS = ("ultra_rare", "secret_rare")  # counted as hits in the collection stats
+
+_TIER_BY_RARITY = {
+    name.lower(): tier for tier, data in RARITY_TIERS.items() for name in data["names"]
+}
+
+
+def rarity_tier(card: Card) -> str | None:
+    return _TIER_BY_RARITY.get((card.rarity or "").lower())
+
+
+_TIER_RANK = {tier: rank for rank, tier in enumerate(RARITY_TIERS)}
+
+_rng = np.random.default_rng()
+
+
+def categorize_cards(cards: List[Card]) -> Dict[str, List[Card]]:
+    categorized: Dict[str, List[Card]] = {tier: [] for tier in RARITY_TIERS}
+    for card in cards:
+        tier = rarity_tier(card)
+        if tier:
+            categorized[tier].append(card)
+    return categorized
+
+
+@dataclass(frozen=True, slots=True)
+class SetPool:
+    """Everything needed to draw a pack from one set, computed once per catalog."""
+
+    set_name: str
+    cards: tuple[Card, ...]
+    commons: tuple[Card, ...]
+    uncommons: tuple[Card, ...]
+    rare_slot: AliasTable[Card] | None
+    # Positions into ``cards`` for the vectorized bulk draw
+    common_idx: np.ndarray = field(repr=False)
+    uncommon_idx: np.ndarray = field(repr=False)
+    rare_idx: np.ndarray = field(repr=False)
+
+    @classmethod
+    def build(cls, set_name: str, cards: List[Card]) -> "SetPool | None":
+        categorized = categorize_cards(cards)
+        if len(categorized["common"]) < 5 or len(categorized["uncommon"]) < 3 or len(cards) < 9:
+            return None
+
+        rares = [card for tier in RARE_SLOT_TIERS for card in categorized[tier]]
+        weights = [RARITY_TIERS[tier]["weight"] for tier in RARE_SLOT_TIERS for _ in categorized[tier]]
+        position = {card.id: i for i, card in enumerate(cards)}
+        return cls(
+            set_name=set_name,
+            cards=tuple(cards),
+            commons=tuple(categorized["common"]),
+            uncommons=tuple(categorized["uncommon"]),
+            rare_slot=AliasTable(rares, weights) if rares else None,
+            common_idx=np.array([position[c.id] for c in categorized["common"]]),
+            uncommon_idx=np.array([position[c.id] for c in categorized["uncommon"]]),
+            rare_idx=np.array([position[c.id] for c in rares], dtype=int),
+        )
+
+    def draw_pack(self, rng: random.Random = random) -> List[Card]:
+        pack = rng.sample(self.commons, 5) + rng.sample(self.uncommons, 3)
+        # Reverse holo - any card in the set
+        pack.append(rng.choice(self.cards))
+        # Rare slot - weighted choice from rare and above
+        if self.rare_slot:
+            pack.append(self.rare_slot.sample(rng))
+        return pack
+
+    def open_packs(self, count: int, rng: np.random.Generator = _rng) -> "BulkPull":
+        """Draw ``count`` packs at once and merge them into one card delta."""
+        # Sampling without replacement per pack: rank random keys and keep the lowest k.
+        commons = self.common_idx[rng.random((count, len(self.common_idx))).argsort(axis=1)[:, :5]]
+        uncommons = self.uncommon_idx[rng.random((count, len(self.uncommon_idx))).argsort(axis=1)[:, :3]]
+        reverse_holos = rng.integers(0, len(self.cards), size=(count, 1))
+        drawn = [commons, uncommons, reverse_holos]
+
+        hits: List[Card] = []
+        if self.rare_slot:
+            rare_slots = self.rare_idx[self.rare_slot.sample_indices(count, rng)]
+            drawn.append(rare_slots[:, None])
+            hits = [self.cards[i] for i in rare_slots]
+            hits.sort(key=lambda card: _TIER_RANK.get(rarity_tier(card), 0), reverse=True)
+
+        counts = np.bincount(np.concatenate(drawn, axis=1).ravel(), minlength=len(self.cards))
+        cards = {self.cards[i].id: int(counts[i]) for i in np.flatnonzero(counts)}
+        return BulkPull(set_name=self.set_name, packs=count, cards=cards, hits=hits)
+
+
+@dataclass(frozen=True, slots=True)
+class BulkPull:
+    set_name: str
+    packs: int
+    cards: Dict[str, int]
+    hits: List[Card]
+
+    def tier_counts(self, catalog: Catalog) -> Dict[str, int]:
+        counts = {tier: 0 for tier in RARITY_TIERS}
+        for card_id, qty in self.cards.items():
+            tier = rarity_tier(catalog.by_id[card_id])
+            if tier:
+                counts[tier] += qty
+        return counts
+
+
+def build_set_pools(catalog: Catalog) -> Dict[str, SetPool]:
+    pools = {}
+    for set_name, cards in catalog.by_set.items():
+        pool = SetPool.build(set_name, list(cards))
+        if pool:
+            pools[set_name] = pool
+    return pools
@@ -0,0 +1,173 @@
+import re
+import unicodedata
+from collections import Counter
+
+from bot.catalog import Card, Catalog
+
+MAX_LISTED_CARDS = 60
+
+_STOPWORDS = {"a", "an", "the", "all", "any", "card", "cards", "set", "sets", "in", "of", "with", "me"}
+
+
+def fold(text: str) -> str:
+    """Casefold, strip accents and collapse punctuation to single spaces."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w]+", " ", text).split())
+
+
+class QueryEngine:
+    """Answers the common /agent question shapes straight from catalog indexes.
+
+    ``answer`` returns formatted text, or ``None`` when the question doesn't match a
+    known pattern and should go to the LLM agent instead.
+    """
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self.cards = catalog.cards
+
+        self.name_tokens: dict[str, set[int]] = {}
+        self.set_index: dict[str, set[int]] = {}
+        self.rarity_index: dict[str, set[int]] = {}
+        self.type_index: dict[str, set[int]] = {}
+        for i, card in enumerate(self.cards):
+            for token in fold(card.name).split():
+                self.name_tokens.setdefault(token, set()).add(i)
+            self.set_index.setdefault(card.set.name, set()).add(i)
+            if card.rarity:
+                self.rarity_index.setdefault(fold(card.rarity), set()).add(i)
+            for card_type in card.types:
+                self.type_index.setdefault(fold(card_type), set()).add(i)
+
+        # Folded set names plus the part after "—" ("HS—Triumphant" -> "triumphant").
+        # Every set in sets.json, so a set with no cards yet has no entry in set_index.
+        self.set_aliases: dict[str, str] = {}
+        for set_name in catalog.sets:
+            self.set_aliases.setdefault(fold(set_name), set_name)
+            if "—" in set_name:
+                suffix = fold(set_name.rsplit("—", 1)[1])
+                if len(suffix) >= 3:
+                    self.set_aliases.setdefault(suffix, set_name)
+
+    def answer(self, question: str) -> str | None:
+        # Every pattern must account for the whole (folded) question: anything
+        # left over, like "released after 2020" or "that are rare", is a
+        # qualifier these shortcuts can't honour, so the LLM gets it instead.
+        q = fold(question)
+        if re.fullmatch(r"how many cards (are )?(there )?(in|per) (each|every) set", q):
+            return self._count_per_set()
+
+        match = re.fullmatch(
+            r"(what (are|is) )?(the )?legalit(y|ies) (of|for) (the )?(cards (in|from) )?(?P<set>.+)", q
+        )
+        if match and (set_name := self._set_named(match["set"])):
+            return self._legalities(set_name)
+
+        match = re.fullmatch(r"how many cards (are )?(there )?(in|does) (?P<set>.+?)( have| contain)?", q)
+        if match and (set_name := self._set_named(match["set"])):
+            return f"➤ **{set_name}** → **{len(self._in_set(set_name))}** cards"
+
+        match = re.fullmatch(r"which sets (contain|have|include) (an? )?(?P<term>[\w ]+?)( cards?)?", q)
+        if match:
+            return self._sets_containing(match["term"])
+
+        match = re.fullmatch(
+            r"((list|show|find|what are)( me)?( all)?( the)? )?cards? (with|named|containing) "
+            r"(?P<term>[\w ]+?)( in (their|the) names?)?",
+            q,
+        )
+        if match:
+            return self._cards_named(match["term"], None)
+
+        match = re.fullmatch(
+            r"(list|show|find|what are)( me)?( all)?( the)? (?P<filter>[\w ]+?) cards? (in|from) (?P<set>.+)", q
+        )
+        if match and (set_name := self._set_named(match["set"])):
+            return self._filter_named(match["filter"], set_name)
+
+        return None
+
+    def _set_named(self, text: str) -> str | None:
+        """The set ``text`` names exactly, allowing a leading "the"/"set" and a trailing "set"."""
+        text = text.removeprefix("the ")
+        for candidate in (text, text.removeprefix("set ")):
+            for name in (candidate, candidate.removesuffix(" set")):
+                if name in self.set_aliases:
+                    return self.set_aliases[name]
+        return None
+
+    def _in_set(self, set_name: str) -> set[int]:
+        return self.set_index.get(set_name, set())
+
+    def _filter_named(self, text: str, set_name: str) -> str | None:
+        if text in self.rarity_index:
+            return self._filter_in_set(self.rarity_index[text], set_name)
+        card_type = re.fullmatch(r"(?P<type>\w+)( type)?( pokemon)?", text)
+        if card_type and card_type["type"] in self.type_index:
+            return self._filter_in_set(self.type_index[card_type["type"]], set_name)
+        if text not in _STOPWORDS:
+            return self._cards_named(text, set_name)
+        return None
+
+    def _match_name(self, term: str) -> set[int] | None:
+        tokens = [t for t in fold(term).split() if t not in _STOPWORDS]
+        if not tokens:
+            return None
+        matches = None
+        for token in tokens:
+            ids = self.name_tokens.get(token)
+            if not ids:
+                return None
+            matches = set(ids) if matches is None else matches & ids
+        return matches
+
+    def _format_cards(self, title: str, positions: set[int], show_set: bool) -> str:
+        cards: list[Card] = sorted(
+            (self.cards[i] for i in positions),
+            key=lambda c: (c.set.release_date or "", c.set.name, c.name),
+        )
+        lines = [
+            f"• {c.name} ({c.set.name}) – {c.rarity or 'Unknown'}" if show_set else f"• {c.name} – {c.rarity or 'Unknown'}"
+            for c in cards[:MAX_LISTED_CARDS]
+        ]
+        if len(cards) > MAX_LISTED_CARDS:
+            lines.append(f"…and **{len(cards) - MAX_LISTED_CARDS}** more")
+        return f"{title}\n" + "\n".join(lines)
+
+    def _count_per_set(self) -> str:
+        counts = sorted(self.set_index.items(), key=lambda item: len(item[1]), reverse=True)
+        return "**Set Totals:**\n" + "\n".join(f"• {name} → {len(ids)} cards" for name, ids in counts)
+
+    def _legalities(self, set_name: str) -> str:
+        card_set = self.catalog.sets[set_name]
+        return (
+            f"➤ **{set_name}**\n"
+            f"• Unlimited: {card_set.legalities_unlimited or 'Not legal'}\n"
+            f"• Expanded: {card_set.legalities_expanded or 'Not legal'}"
+        )
+
+    def _sets_containing(self, term: str) -> str | None:
+        matches = self._match_name(term)
+        if not matches:
+            return None
+        counts = Counter(self.cards[i].set.name for i in matches)
+        lines = [f"• {name} → {n} cards" for name, n in counts.most_common()]
+        return f"**Sets with {term.title()}:**\n" + "\n".join(lines)
+
+    def _cards_named(self, term: str, set_name: str | None) -> str | None:
+        matches = self._match_name(term)
+        if matches is None:
+            return None
+        if set_name:
+            matches &= self._in_set(set_name)
+        if not matches:
+            return None
+        title = f"**{term.title()} Cards Found" + (f" in {set_name}" if set_name else "") + ":**"
+        return self._format_cards(title, matches, show_set=set_name is None)
+
+    def _filter_in_set(self, positions: set[int], set_name: str) -> str | None:
+        matches = positions & self._in_set(set_name)
+        if not matches:
+            return None
+        return self._format_cards(f"➤ **Set: {set_name}**", matches, show_set=False)
@@ -0,0 +1,202 @@
+import functools
+import heapq
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Generic, Hashable, Iterable, TypeVar
+
+T = TypeVar("T", bound=Hashable)
+
+MAX_CHOICES = 25  # Discord's autocomplete limit
+GRAM = 3
+CACHE_SIZE = 4096
+
+# Match tiers, best first.
+PREFIX, WORD_PREFIX, SUBSTRING = range(3)
+
+
+@functools.lru_cache(maxsize=65536)
+def fold(text: str) -> str:
+    """Lower-case and strip accents, so "pokemon" matches "Pokémon"."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def match_tier(key: str, query: str) -> int | None:
+    """How ``query`` (folded) matches ``key`` (folded), or None if it is not a substring."""
+    if key.startswith(query):
+        return PREFIX
+    if query not in key:
+        return None
+    if " " + query in key or "-" + query in key:
+        return WORD_PREFIX
+    return SUBSTRING
+
+
+def filter_choices(query: str, labels: Iterable[tuple[str, T]], limit: int = MAX_CHOICES) -> list[tuple[str, T]]:
+    """Rank a short, per-user list of ``(label, value)`` pairs the same way SearchIndex does.
+
+    A linear pass, meant for lists the size of one player's collection; folded
+    labels come from ``fold``'s cache, so nothing is re-lowered per keystroke.
+    """
+    query = fold(query.strip())
+    ranked = []
+    for i, (label, value) in enumerate(labels):
+        key = fold(label)
+        tier = match_tier(key, query)
+        if tier is not None:
+            ranked.append((tier, len(key), key, i, label, value))
+    return [(label, value) for *_, label, value in heapq.nsmallest(limit, ranked)]
+
+
+def _grams(key: str) -> set[str]:
+    return {key[i:i + n] for n in range(1, GRAM + 1) for i in range(len(key) - n + 1)}
+
+
+def _word_prefixes(key: str) -> set[str]:
+    starts = [i + 1 for i, c in enumerate(key) if c in " -"]
+    return {key[i:i + n] for i in starts for n in range(1, GRAM + 1) if i + n <= len(key)}
+
+
+def _trigrams(query: str) -> set[str]:
+    return {query[i:i + GRAM] for i in range(len(query) - GRAM + 1)}
+
+
+class SearchIndex(Generic[T]):
+    """Autocomplete over a fixed set of labels (set names, card names, ...).
+
+    Labels are folded once and indexed by every 1-3 character substring, with
+    separate postings for label prefixes and word prefixes. Every posting list
+    is kept in popularity order, so a search walks the prefix, word-prefix and
+    substring lists for the query's first characters (or its rarest trigram)
+    and stops at the first 25 real matches; nothing is ranked per query. Ties
+    go to the shorter label. If nothing contains the query, labels sharing most
+    of its trigrams are returned instead, so typos still find something.
+
+    ``bump`` raises a value's popularity at runtime and re-sorts the postings on
+    the next search, so it is meant for small indexes such as set names. Results
+    are cached per folded query until the next bump.
+    """
+
+    def __init__(self, entries: Iterable[tuple[str, T]], popularity: dict[T, float] | None = None):
+        values_by_key: dict[str, list[T]] = {}
+        labels: dict[str, str] = {}
+        for label, value in entries:
+            key = fold(label)
+            values_by_key.setdefault(key, []).append(value)
+            labels.setdefault(key, label)
+
+        self.keys: list[str] = sorted(values_by_key, key=lambda k: (len(k), k))
+        self.labels: list[str] = [labels[k] for k in self.keys]
+        self.values: list[tuple[T, ...]] = [tuple(values_by_key[k]) for k in self.keys]
+        self._key_of: dict[T, int] = {value: i for i, values in enumerate(self.values) for value in values}
+        self.popularity: dict[T, float] = dict(popularity or {})
+        self._key_popularity = [
+            sum(self.popularity.get(value, 0) for value in values) for values in self.values
+        ]
+
+        postings: dict[str, list[int]] = {}
+        prefixes: dict[str, list[int]] = {}
+        word_prefixes: dict[str, list[int]] = {}
+        for i, key in enumerate(self.keys):
+            for gram in _grams(key):
+                postings.setdefault(gram, []).append(i)
+            for n in range(1, min(GRAM, len(key)) + 1):
+                prefixes.setdefault(key[:n], []).append(i)
+            for gram in _word_prefixes(key):
+                word_prefixes.setdefault(gram, []).append(i)
+        self._postings = postings
+        self._prefixes = prefixes
+        self._word_prefixes = word_prefixes
+        self._everything = list(range(len(self.keys)))
+        self._cache: OrderedDict[str, list[tuple[str, T]]] = OrderedDict()
+        self._sort()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _sort(self) -> None:
+        order = self._popularity_order()
+        for index in (self._postings, self._prefixes, self._word_prefixes):
+            for ids in index.values():
+                ids.sort(key=order.__getitem__)
+        self._everything.sort(key=order.__getitem__)
+        self._dirty = False
+
+    def _popularity_order(self) -> list[tuple[float, int]]:
+        return [(-popularity, i) for i, popularity in enumerate(self._key_popularity)]
+
+    def bump(self, value: T, amount: float = 1) -> None:
+        i = self._key_of.get(value)
+        if i is None:
+            return
+        self.popularity[value] = self.popularity.get(value, 0) + amount
+        self._key_popularity[i] += amount
+        self._dirty = True
+        self._cache.clear()
+
+    def _substring_matches(self, query: str) -> list[int]:
+        # Walk the prefix, word-prefix and substring postings for the query's head
+        # (each already in popularity order) and keep the first 25 that really match.
+        grams = {query} if len(query) <= GRAM else _trigrams(query)
+        substring = min((self._postings.get(g, ()) for g in grams), key=len)
+        head = query[:GRAM]
+        word_starts = (" " + query, "-" + query)
+        tiers = (
+            (self._prefixes.get(head, ()), lambda key: key.startswith(query)),
+            (self._word_prefixes.get(head, ()), lambda key: word_starts[0] in key or word_starts[1] in key),
+            (substring, lambda key: query in key),
+        )
+
+        keys = self.keys
+        ids: list[int] = []
+        seen: set[int] = set()
+        for postings, matches in tiers:
+            for i in postings:
+                if i not in seen and matches(keys[i]):
+                    seen.add(i)
+                    ids.append(i)
+                    if len(ids) == MAX_CHOICES:
+                        return ids
+        return ids
+
+    def _fuzzy(self, query: str, limit: int) -> list[int]:
+        grams = _trigrams(query)
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        needed = max(1, len(grams) // 2)
+        popularity = self._key_popularity
+        return heapq.nsmallest(
+            limit,
+            (i for i, n in shared.items() if n >= needed),
+            key=lambda i: (-shared[i], -popularity[i], i),
+        )
+
+    def search(self, query: str, limit: int = MAX_CHOICES) -> list[tuple[str, T]]:
+        """Top ``(label, value)`` matches for ``query``; an empty query lists the most popular."""
+        query = fold(query.strip())
+        cached = self._cache.get(query)
+        if cached is not None:
+            self._cache.move_to_end(query)
+            return cached[:limit]
+
+        if self._dirty:
+            self._sort()
+        if not query:
+            ids = self._everything[:MAX_CHOICES]
+        else:
+            ids = self._substring_matches(query) or self._fuzzy(query, MAX_CHOICES)
+
+        results = []
+        for i in ids:
+            results.extend((self.labels[i], value) for value in self.values[i])
+            if len(results) >= MAX_CHOICES:
+                break
+        results = results[:MAX_CHOICES]
+
+        self._cache[query] = results
+        if len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return results[:limit]
@@ -14,6 +14,36 @@ class BotSettings(BaseSettings):
     db_user: str = Field(..., alias="DB_USER")
     db_password: str = Field(..., alias="DB_PASSWORD")
 
+    inventory_cache_backend: str = Field("local", alias="INVENTORY_CACHE_BACKEND")
+    inventory_cache_ttl: int = Field(30, alias="INVENTORY_CACHE_TTL")
+
+    agent_cache_backend: str = Field("redis", alias="AGENT_CACHE_BACKEND")  # "redis" or "sqlite"
+    agent_cache_path: str = Field("/app/cache/agent_answers.sqlite3", alias="AGENT_CACHE_PATH")
+    agent_cache_ttl: int = Field(7 * 86400, alias="AGENT_CACHE_TTL")
+    agent_cache_max_entries: int = Field(5000, alias="AGENT_CACHE_MAX_ENTRIES")
+    agent_cache_semantic: bool = Field(False, alias="AGENT_CACHE_SEMANTIC")
+    agent_cache_similarity: float = Field(0.95, alias="AGENT_CACHE_SIMILARITY")
+
+    metrics_host: str = Field("0.0.0.0", alias="METRICS_HOST")
+    metrics_port: int = Field(8080, alias="METRICS_PORT")
+
+    log_sample_rates: dict[str, float] = Field({}, alias="LOG_SAMPLE_RATES")
+
+    watchdog_enabled: bool = Field(False, alias="WATCHDOG_ENABLED")
+    watchdog_threshold: float = Field(0.1, alias="WATCHDOG_THRESHOLD")
+    watchdog_profile_path: str = Field("/app/cache/loop_stalls.txt", alias="WATCHDOG_PROFILE_PATH")
+
+    open_pack_daily_limit: int = Field(5, alias="OPEN_PACK_DAILY_LIMIT")  # packs, not commands; raise for events
+
+    catalog_reload_interval: int = Field(300, alias="CATALOG_RELOAD_INTERVAL")
+
+    trade_offer_ttl: int = Field(60, alias="TRADE_OFFER_TTL")
+    trade_sweep_interval: int = Field(15, alias="TRADE_SWEEP_INTERVAL")
+
+    write_behind_enabled: bool = Field(False, alias="WRITE_BEHIND_ENABLED")
+    write_behind_interval_ms: int = Field(50, alias="WRITE_BEHIND_INTERVAL_MS")
+    write_behind_max_cards: int = Field(5000, alias="WRITE_BEHIND_MAX_CARDS")
+
     class Config:
         secrets_dir = "/etc/secrets"
 
@@ -0,0 +1,284 @@
+import asyncio
+import base64
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Awaitable, Callable, NamedTuple
+
+import numpy as np
+from redis.asyncio import Redis
+
+from bot.utils.metrics import ANSWER_CACHE_LOOKUPS
+
+Embedder = Callable[[str], Awaitable[list[float]]]
+
+
+def normalize_question(question: str) -> str:
+    text = unicodedata.normalize("NFKC", question).casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+class Lookup(NamedTuple):
+    answer: str | None
+    # The question's embedding if the lookup computed one; hand it back to put().
+    embedding: np.ndarray | None = None
+
+
+class AnswerCache:
+    """/agent answers keyed on normalized question + catalog version.
+
+    Entries expire ``ttl`` seconds after they are written and the least recently
+    used are evicted past ``max_entries``. With ``embed`` set, an exact-key miss
+    falls back to the most similar cached question. Subclasses provide storage.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        max_entries: int,
+        embed: Embedder | None = None,
+        similarity: float = 0.95,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embed = embed
+        self.similarity = similarity
+
+    @staticmethod
+    def _key(question: str, catalog_version: str) -> str:
+        return hashlib.sha1(f"{catalog_version}:{question}".encode()).hexdigest()
+
+    async def get(self, question: str, catalog_version: str) -> Lookup:
+        normalized = normalize_question(question)
+        answer = await self._fetch(self._key(normalized, catalog_version))
+        if answer is not None:
+            ANSWER_CACHE_LOOKUPS.labels("hit").inc()
+            return Lookup(answer)
+
+        embedding = None
+        if self.embed is not None:
+            embedding = np.asarray(await self.embed(normalized), dtype=np.float32)
+            answer = await self._get_similar(embedding, catalog_version)
+            if answer is not None:
+                ANSWER_CACHE_LOOKUPS.labels("semantic_hit").inc()
+                return Lookup(answer, embedding)
+
+        ANSWER_CACHE_LOOKUPS.labels("miss").inc()
+        return Lookup(None, embedding)
+
+    async def put(
+        self, question: str, catalog_version: str, answer: str, embedding: np.ndarray | None = None
+    ) -> None:
+        normalized = normalize_question(question)
+        if self.embed is not None and embedding is None:
+            embedding = np.asarray(await self.embed(normalized), dtype=np.float32)
+        await self._store(self._key(normalized, catalog_version), catalog_version, normalized, answer, embedding)
+
+    async def _get_similar(self, embedding: np.ndarray, catalog_version: str) -> str | None:
+        keys, matrix = await self._vectors(catalog_version)
+        if not keys:
+            return None
+        scores = matrix @ (embedding / np.linalg.norm(embedding))
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity:
+            return None
+        return await self._fetch(keys[best])
+
+    async def _fetch(self, key: str) -> str | None:
+        """The live answer stored under ``key``, marking it used."""
+        raise NotImplementedError
+
+    async def _store(
+        self, key: str, catalog_version: str, question: str, answer: str, embedding: np.ndarray | None
+    ) -> None:
+        raise NotImplementedError
+
+    async def _vectors(self, catalog_version: str) -> tuple[list[str], np.ndarray]:
+        """Keys and unit-normalized embeddings of the answers for ``catalog_version``."""
+        raise NotImplementedError
+
+
+def _normalized(vectors: list[np.ndarray]) -> np.ndarray:
+    matrix = np.array(vectors)
+    if vectors:
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix
+
+
+class SqliteAnswerCache(AnswerCache):
+    """Answers in a local SQLite file; survives restarts but is per replica."""
+
+    def __init__(self, path: str | Path, ttl: int, max_entries: int, **kwargs):
+        super().__init__(ttl, max_entries, **kwargs)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                catalog_version TEXT NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                embedding BLOB,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+        self._conn.commit()
+
+        # Embedding matrix for one catalog version, rebuilt lazily after writes.
+        self._matrix: tuple[str, list[str], np.ndarray] | None = None
+
+    async def _fetch(self, key: str) -> str | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def _store(self, key, catalog_version, question, answer, embedding) -> None:
+        blob = embedding.tobytes() if embedding is not None else None
+        await asyncio.to_thread(self._put, key, catalog_version, question, answer, blob)
+
+    async def _vectors(self, catalog_version: str) -> tuple[list[str], np.ndarray]:
+        return await asyncio.to_thread(self._load_vectors, catalog_version)
+
+    def _get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer FROM answers WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def _put(self, key: str, catalog_version: str, question: str, answer: str, embedding: bytes | None) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, catalog_version, question, answer, embedding, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM answers WHERE created_at <= ? OR key IN ("
+                "  SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?"
+                ")",
+                (now - self.ttl, self.max_entries),
+            )
+            self._conn.commit()
+            self._matrix = None
+
+    def _load_vectors(self, catalog_version: str) -> tuple[list[str], np.ndarray]:
+        with self._lock:
+            if self._matrix is not None and self._matrix[0] == catalog_version:
+                return self._matrix[1], self._matrix[2]
+            rows = self._conn.execute(
+                "SELECT key, embedding FROM answers WHERE catalog_version = ? AND embedding IS NOT NULL",
+                (catalog_version,),
+            ).fetchall()
+            keys = [key for key, _ in rows]
+            matrix = _normalized([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+            self._matrix = (catalog_version, keys, matrix)
+            return keys, matrix
+
+
+class RedisAnswerCache(AnswerCache):
+    """Answers in Redis, shared by every replica and kept across restarts.
+
+    Each answer is a hash expiring ``ttl`` after it was written. A sorted set of
+    last-use times drives LRU eviction, and each catalog version's embeddings
+    sit in one hash that a replica reloads whenever its size changes. A sorted
+    set of write times per catalog version finds the embeddings of expired
+    answers, which are pruned before the vectors are read.
+    """
+
+    PREFIX = "agent_answer"
+
+    def __init__(self, redis: Redis, ttl: int, max_entries: int, **kwargs):
+        super().__init__(ttl, max_entries, **kwargs)
+        self.redis = redis
+        self._lru = f"{self.PREFIX}:lru"
+        self._matrix: tuple[str, int, list[str], np.ndarray] | None = None
+
+    def _answer_key(self, key: str) -> str:
+        return f"{self.PREFIX}:{key}"
+
+    def _embeddings_key(self, catalog_version: str) -> str:
+        return f"{self.PREFIX}:embeddings:{catalog_version}"
+
+    def _written_key(self, catalog_version: str) -> str:
+        return f"{self.PREFIX}:written:{catalog_version}"
+
+    async def _fetch(self, key: str) -> str | None:
+        answer = await self.redis.hget(self._answer_key(key), "answer")
+        if answer is None:
+            await self.redis.zrem(self._lru, key)
+            return None
+        await self.redis.zadd(self._lru, {key: time.time()})
+        return answer
+
+    async def _store(self, key, catalog_version, question, answer, embedding) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                self._answer_key(key),
+                mapping={"catalog_version": catalog_version, "question": question, "answer": answer},
+            )
+            pipe.expire(self._answer_key(key), self.ttl)
+            pipe.zadd(self._lru, {key: time.time()})
+            if embedding is not None:
+                encoded = base64.b64encode(embedding.astype(np.float32).tobytes()).decode()
+                pipe.hset(self._embeddings_key(catalog_version), key, encoded)
+                pipe.expire(self._embeddings_key(catalog_version), self.ttl)
+                pipe.zadd(self._written_key(catalog_version), {key: time.time()})
+                pipe.expire(self._written_key(catalog_version), self.ttl)
+            await pipe.execute()
+        await self._evict()
+
+    async def _evict(self) -> None:
+        stale = await self.redis.zrange(self._lru, 0, -self.max_entries - 1)
+        if not stale:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in stale:
+                pipe.hget(self._answer_key(key), "catalog_version")
+            versions = await pipe.execute()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for key, catalog_version in zip(stale, versions):
+                pipe.delete(self._answer_key(key))
+                if catalog_version is not None:
+                    pipe.hdel(self._embeddings_key(catalog_version), key)
+                    pipe.zrem(self._written_key(catalog_version), key)
+            pipe.zrem(self._lru, *stale)
+            await pipe.execute()
+
+    async def _prune_expired(self, catalog_version: str) -> None:
+        """Drop the embeddings (and LRU entries) of answers that have expired."""
+        written_key = self._written_key(catalog_version)
+        expired = await self.redis.zrangebyscore(written_key, "-inf", time.time() - self.ttl)
+        if not expired:
+            return
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hdel(self._embeddings_key(catalog_version), *expired)
+            pipe.zrem(written_key, *expired)
+            pipe.zrem(self._lru, *expired)
+            await pipe.execute()
+
+    async def _vectors(self, catalog_version: str) -> tuple[list[str], np.ndarray]:
+        await self._prune_expired(catalog_version)
+        embeddings_key = self._embeddings_key(catalog_version)
+        size = await self.redis.hlen(embeddings_key)
+        if self._matrix is not None and self._matrix[:2] == (catalog_version, size):
+            return self._matrix[2], self._matrix[3]
+        rows = await self.redis.hgetall(embeddings_key)
+        keys = list(rows)
+        matrix = _normalized([np.frombuffer(base64.b64decode(rows[key]), dtype=np.float32) for key in keys])
+        self._matrix = (catalog_version, len(keys), keys, matrix)
+        return keys, matrix
@@ -1,40 +1,165 @@
 from functools import wraps
+import asyncio
+import atexit
 import logging
 import contextvars
 import discord
 import json
-import time
-from typing import Callable
-import asyncio
+import queue
+import random
+import sys
+import threading
 import uuid 
+import weakref
+from logging.handlers import QueueHandler
+from typing import TextIO
 from discord.ext import commands
 
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib encoder
+    orjson = None
+
 current_user_id = contextvars.ContextVar("current_user_id", default=None)
 current_guild_id = contextvars.ContextVar("current_guild_id", default=None)
 current_correlation_id = contextvars.ContextVar("correlation_id", default=None)
+# Lets the loop watchdog, which runs on another thread, see whose task is running.
+task_correlation_ids: "weakref.WeakKeyDictionary[asyncio.Task, str]" = weakref.WeakKeyDictionary()
 
+LOG_BATCH_SIZE = 256
+
+_writer: "BatchLogWriter | None" = None
 
-def setup_logging():
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    handler = logging.StreamHandler()
 
-    formatter = ContextInjectingFormatter("%(message)s")
-    handler.setFormatter(formatter)
+def _dumps(payload: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload, default=str).decode()
+    return json.dumps(payload, default=str)
 
+
+def setup_logging(sample_rates: dict[str, float] | None = None, stream: TextIO | None = None):
+    """Route all logging through a queue to a background writer thread.
+
+    ``sample_rates`` maps logger names to the fraction of their INFO-and-below
+    records to keep, e.g. ``{"pandasai": 0.1}``; warnings and errors are never dropped.
+    """
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _writer = BatchLogWriter(log_queue, ContextInjectingFormatter("%(message)s"), stream or sys.stderr)
+    _writer.start()
+
+    handler = ContextQueueHandler(log_queue)
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
     logger.handlers.clear()
     logger.addHandler(handler)
 
 
+class ContextQueueHandler(QueueHandler):
+    """Captures the log context on the calling task and defers formatting to the writer."""
+
+    def prepare(self, record):
+        record.user_id = current_user_id.get()
+        record.guild_id = current_guild_id.get()
+        record.correlation_id = current_correlation_id.get()
+        # Resolve args now so the record doesn't see later mutations of them.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            # Most specific configured ancestor wins: "pandasai.agent" uses "pandasai".
+            rate = 1.0
+            parts = name.split(".")
+            for i in range(len(parts), 0, -1):
+                prefix = ".".join(parts[:i])
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class BatchLogWriter:
+    """Drains the log queue on a daemon thread, writing everything queued in one go."""
+
+    _STOP = object()
+
+    def __init__(self, log_queue: queue.SimpleQueue, formatter: logging.Formatter, stream: TextIO):
+        self.queue = log_queue
+        self.formatter = formatter
+        self.stream = stream
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if self._thread.is_alive():
+            self.queue.put(self._STOP)
+            self._thread.join()
+        atexit.unregister(self.stop)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(record is self._STOP for record in batch)
+            lines = []
+            for record in batch:
+                if record is self._STOP:
+                    continue
+                try:
+                    lines.append(self.formatter.format(record))
+                except Exception:
+                    lines.append(_dumps({"message": f"Unformattable log record from {record.name}: {record.msg!r}"}))
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                except Exception:
+                    pass
+            if stop:
+                return
+
+
 class ContextInjectingFormatter(logging.Formatter):
     def format(self, record):
-        user_id = current_user_id.get()
-        guild_id = current_guild_id.get()
-        correlation_id = current_correlation_id.get()
+        # Records from ContextQueueHandler carry the context of the task that logged them.
+        user_id = getattr(record, "user_id", None) or current_user_id.get()
+        guild_id = getattr(record, "guild_id", None) or current_guild_id.get()
+        correlation_id = getattr(record, "correlation_id", None) or current_correlation_id.get()
         message = super().format(record)
 
         log_output = {"user_id": user_id, "guild_id": guild_id, "correlation_id": correlation_id, "message": message}
-        return json.dumps(log_output)
+        return _dumps(log_output)
 
 def inject_log_context(func):
     @wraps(func)
@@ -46,38 +171,10 @@ def inject_log_context(func):
 
         current_user_id.set(interaction.user.name)
         current_guild_id.set(interaction.guild.name if interaction.guild else None)
-        current_correlation_id.set(uuid.uuid4().hex[:8]) 
+        correlation_id = uuid.uuid4().hex[:8]
+        current_correlation_id.set(correlation_id)
+        task_correlation_ids[asyncio.current_task()] = correlation_id
 
         return await func(*args, **kwargs)
     return wrapper
 
-
-def log_time(log_func: Callable, label: str | None = None):
-    def decorator(func):
-        @wraps(func)
-        def sync_wrapper(*args, **kwargs):
-            name = label or func.__name__
-            log_func(f"[START] {name}")
-            start = time.perf_counter()
-
-            result = func(*args, **kwargs)
-
-            duration_sec = round(time.perf_counter() - start, 2)
-            log_func(f"[END] {name} - {duration_sec} sec")
-            return result
-
-        @wraps(func)
-        async def async_wrapper(*args, **kwargs):
-            name = label or func.__name__
-            log_func(f"[START] {name}")
-            start = time.perf_counter()
-
-            result = await func(*args, **kwargs)
-
-            duration_sec = round(time.perf_counter() - start, 2)
-            log_func(f"[END] {name} - {duration_sec} sec")
-            return result
-
-        return async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
-
-    return decorator
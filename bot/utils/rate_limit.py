@@ -1,22 +1,195 @@
+import asyncio
 import time
 import functools
-from typing import Callable
+import uuid
+from collections import OrderedDict
+from typing import Callable, Literal
 
 from discord import Interaction
-from redis.asyncio import Redis
-from redis.backoff import ExponentialBackoff
-from redis.retry import Retry
-from bot.settings import config
+from bot.utils.metrics import RATE_LIMIT_REJECTIONS
+from bot.utils.redis_client import redis_client as _redis
 
-_redis = Redis(
-    host=config.redis_host,
-    port=config.redis_port,
-    decode_responses=True,
-    retry=Retry(ExponentialBackoff(), retries=3),
-)
+Policy = Literal["fixed_window", "sliding_window", "token_bucket"]
 
+# Every script takes KEYS[1] = bucket key, ARGV = (limit, period_ms, cost[, member]) and
+# returns {allowed (0/1), ms until the key resets or a call of that cost would be allowed}.
+# A rejected call spends nothing. Time comes from the Redis server so replicas
+# with skewed clocks agree.
 
-def rate_limit(key_func: Callable[[Interaction], str], limit: int, period: int):
+_FIXED_WINDOW = """
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local ttl = redis.call('PTTL', KEYS[1])
+if current + cost > tonumber(ARGV[1]) then
+    if ttl < 0 then
+        ttl = period
+    end
+    return {0, ttl}
+end
+redis.call('INCRBY', KEYS[1], cost)
+if ttl < 0 then
+    redis.call('PEXPIRE', KEYS[1], period)
+    ttl = period
+end
+return {1, ttl}
+"""
+
+_SLIDING_WINDOW_LOG = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - period)
+local count = redis.call('ZCARD', KEYS[1])
+if count + cost <= limit then
+    for i = 1, cost do
+        redis.call('ZADD', KEYS[1], now, ARGV[4] .. ':' .. i)
+    end
+    redis.call('PEXPIRE', KEYS[1], period)
+    return {1, 0}
+end
+if cost > limit then
+    return {0, period}
+end
+-- Wait until enough of the oldest entries have expired to fit ``cost``.
+local freed = count + cost - limit - 1
+local entry = redis.call('ZRANGE', KEYS[1], freed, freed, 'WITHSCORES')
+return {0, tonumber(entry[2]) + period - now}
+"""
+
+_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = capacity / tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local allowed, wait = 0, math.ceil((cost - tokens) / rate)
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed, wait = 1, 0
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+return {allowed, wait}
+"""
+
+# register_script computes each SHA once and sends EVALSHA, reloading the script on
+# NOSCRIPT (e.g. after a Redis restart or failover).
+_SCRIPTS = {
+    "fixed_window": _redis.register_script(_FIXED_WINDOW),
+    "sliding_window": _redis.register_script(_SLIDING_WINDOW_LOG),
+    "token_bucket": _redis.register_script(_TOKEN_BUCKET),
+}
+
+LOCAL_CACHE_SIZE = 10_000
+
+# Keys Redis has rejected, mapped to the monotonic time they can next be allowed.
+# Other replicas can only spend more of a key's budget, never refund it, so a
+# rejection stays valid until that time no matter who else is calling.
+_exhausted: OrderedDict[str, float] = OrderedDict()
+# Keys with a Redis check in flight; later callers for the same key wait on it.
+_inflight: dict[str, asyncio.Event] = {}
+
+
+async def load_scripts() -> None:
+    """Load the limiter scripts up front so the first call per key isn't a NOSCRIPT retry."""
+    for script in _SCRIPTS.values():
+        await _redis.script_load(script.script)
+
+
+def _local_wait(key: str) -> float | None:
+    reset_at = _exhausted.get(key)
+    if reset_at is None:
+        return None
+    wait = reset_at - time.monotonic()
+    if wait <= 0:
+        del _exhausted[key]
+        return None
+    _exhausted.move_to_end(key)
+    return wait
+
+
+def _mark_exhausted(key: str, wait: float) -> None:
+    _exhausted[key] = time.monotonic() + wait
+    _exhausted.move_to_end(key)
+    while len(_exhausted) > LOCAL_CACHE_SIZE:
+        _exhausted.popitem(last=False)
+
+
+def _limit_name(key: str) -> str:
+    # "open_pack_daily:1234" -> "open_pack_daily", so metrics aren't labelled per user.
+    return key.split(":", 1)[0]
+
+
+async def _evaluate(key: str, limit: int, period: int, policy: Policy, cost: int) -> tuple[bool, float]:
+    args = [limit, period * 1000, cost]
+    if policy == "sliding_window":
+        args.append(uuid.uuid4().hex)
+    allowed, wait_ms = await _SCRIPTS[policy](keys=[key], args=args)
+    return bool(allowed), int(wait_ms) / 1000
+
+
+async def check_rate_limit(
+    key: str, limit: int, period: int, policy: Policy = "fixed_window", cost: int = 1
+) -> tuple[bool, float]:
+    """Charge ``cost`` against ``key`` and return (allowed, seconds until it resets / retry).
+
+    Keys already known to be exhausted are rejected locally without touching Redis.
+    Concurrent checks for one key run one at a time, so a rejection is seen by
+    everyone queued behind it instead of each sending its own doomed request.
+    """
+    while True:
+        wait = _local_wait(key)
+        if wait is not None:
+            RATE_LIMIT_REJECTIONS.labels(_limit_name(key), "local").inc()
+            return False, wait
+        pending = _inflight.get(key)
+        if pending is None:
+            break
+        await pending.wait()
+
+    done = _inflight[key] = asyncio.Event()
+    try:
+        allowed, wait = await _evaluate(key, limit, period, policy, cost)
+        if not allowed:
+            RATE_LIMIT_REJECTIONS.labels(_limit_name(key), "redis").inc()
+            # A costly call can be refused while a cheaper one would still fit.
+            if wait > 0 and cost == 1:
+                _mark_exhausted(key, wait)
+        return allowed, wait
+    finally:
+        del _inflight[key]
+        done.set()
+
+
+def _describe_period(period: int) -> str:
+    for seconds, name in ((86400, "day"), (3600, "hour"), (60, "minute")):
+        if period == seconds:
+            return name
+    return f"{period} seconds"
+
+
+def rate_limit(
+    key_func: Callable[[Interaction], str],
+    limit: int,
+    period: int,
+    policy: Policy = "fixed_window",
+    cost_param: str | None = None,
+    cost_unit: str = "uses",
+):
+    """Limit a command per ``key_func(interaction)``.
+
+    With ``cost_param``, each call is charged the value of that command
+    parameter (e.g. the number of packs) instead of 1. A call costing more
+    than ``limit`` could never be allowed, so it is refused up front, naming
+    the limit in ``cost_unit``, instead of being told to retry later.
+    """
     def decorator(func):
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
@@ -24,13 +197,16 @@ def rate_limit(key_func: Callable[[Interaction], str], limit: int, period: int):
             if not interaction:
                 raise ValueError("Missing Interaction argument for rate limiting")
 
-            key = key_func(interaction)
-            current = await _redis.incr(key)
-            if current == 1:
-                await _redis.expire(key, period)
-
-            if current > limit:
-                reset_time = int(time.time() + await _redis.ttl(key))
+            cost = kwargs.get(cost_param, 1) if cost_param else 1
+            if cost > limit:
+                await interaction.response.send_message(
+                    f"⚠️ The limit is {limit} {cost_unit} per {_describe_period(period)}; ask for fewer.",
+                    ephemeral=True,
+                )
+                return
+            allowed, retry_after = await check_rate_limit(key_func(interaction), limit, period, policy, cost)
+            if not allowed:
+                reset_time = int(time.time() + retry_after)
                 await interaction.response.send_message(
                     f"⏳ Rate limited. Try again <t:{reset_time}:R>.",
                     ephemeral=True,
@@ -0,0 +1,11 @@
+from redis.asyncio import Redis
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
+from bot.settings import config
+
+redis_client = Redis(
+    host=config.redis_host,
+    port=config.redis_port,
+    decode_responses=True,
+    retry=Retry(ExponentialBackoff(), retries=3),
+)
@@ -0,0 +1,51 @@
+import random
+from typing import Generic, Sequence, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+
+class AliasTable(Generic[T]):
+    """Walker/Vose alias table: O(n) to build, O(1) per weighted draw."""
+
+    __slots__ = ("items", "prob", "alias", "_prob_array", "_alias_array")
+
+    def __init__(self, items: Sequence[T], weights: Sequence[float]):
+        if not items or len(items) != len(weights):
+            raise ValueError("AliasTable needs one weight per item and at least one item")
+
+        n = len(items)
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+        prob = [0.0] * n
+        alias = [0] * n
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            lo, hi = small.pop(), large.pop()
+            prob[lo] = scaled[lo]
+            alias[lo] = hi
+            scaled[hi] -= 1.0 - scaled[lo]
+            (small if scaled[hi] < 1.0 else large).append(hi)
+        for i in small + large:
+            prob[i] = 1.0
+
+        self.items = tuple(items)
+        self.prob = prob
+        self.alias = alias
+        self._prob_array = np.asarray(prob)
+        self._alias_array = np.asarray(alias)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def sample(self, rng: random.Random = random) -> T:
+        i = rng.randrange(len(self.items))
+        return self.items[i] if rng.random() < self.prob[i] else self.items[self.alias[i]]
+
+    def sample_indices(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """Draw ``n`` positions into ``items`` at once."""
+        i = rng.integers(0, len(self.items), size=n)
+        return np.where(rng.random(n) < self._prob_array[i], i, self._alias_array[i])
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from bot.utils.logging_utils import current_correlation_id, task_correlation_ids
+from bot.utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+LOOP_STALLS = Counter("bot_event_loop_stalls_total", "Callbacks that blocked the event loop past the watchdog threshold.")
+
+STACK_DEPTH = 12  # innermost frames kept per stall, and used to group them
+
+
+@dataclass(slots=True)
+class _Stall:
+    beat: float
+    stack: tuple[str, ...]
+    correlation_id: str | None
+    task_name: str | None
+    duration: float = 0.0
+
+
+@dataclass(slots=True)
+class _StackProfile:
+    stack: tuple[str, ...]
+    count: int = 0
+    total: float = 0.0
+    worst: float = 0.0
+    correlation_ids: list[str] = field(default_factory=list)
+    task_names: set[str] = field(default_factory=set)
+
+
+class LoopWatchdog:
+    """Detects callbacks that block the event loop and profiles where they blocked.
+
+    A heartbeat coroutine stamps the time every ``interval``; a daemon thread
+    notices when the stamp goes stale by more than ``threshold``, grabs the loop
+    thread's stack right then, and attributes it to the running task's
+    correlation id. Stalls are aggregated by stack and written to ``profile_path``
+    every ``dump_interval`` seconds, from the watchdog thread.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        profile_path: str | Path,
+        interval: float = 0.05,
+        dump_interval: float = 60.0,
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.dump_interval = dump_interval
+        self.profile_path = Path(profile_path)
+        self.profiles: dict[tuple[str, ...], _StackProfile] = {}
+        self._beat = time.perf_counter()
+        self._stall: _Stall | None = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._heartbeat: asyncio.Task | None = None
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._loop.set_task_factory(_inherit_correlation_id)
+        self._heartbeat = self._loop.create_task(self._beat_forever())
+        self._thread.start()
+        logger.info(f"Loop watchdog on: threshold {self.threshold * 1000:.0f} ms, profile at {self.profile_path}")
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+        if self._heartbeat:
+            self._heartbeat.cancel()
+        self.dump()
+
+    async def _beat_forever(self) -> None:
+        while True:
+            self._beat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+
+    def _watch(self) -> None:
+        next_dump = time.monotonic() + self.dump_interval
+        while not self._stopped.wait(self.interval / 2):
+            if time.monotonic() >= next_dump:
+                self.dump()
+                next_dump = time.monotonic() + self.dump_interval
+            beat = self._beat
+            blocked = time.perf_counter() - beat - self.interval
+            stall = self._stall
+            if stall is not None and (stall.beat != beat or blocked < self.threshold):
+                self._record(stall)
+                self._stall = stall = None
+            if blocked >= self.threshold:
+                if stall is None:
+                    self._stall = stall = self._capture(beat)
+                stall.duration = blocked
+
+    def _capture(self, beat: float) -> _Stall:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = tuple(
+            f"{f.filename}:{f.lineno} in {f.name}" for f in traceback.extract_stack(frame)[-STACK_DEPTH:]
+        ) if frame else ()
+        task = asyncio.current_task(self._loop)
+        return _Stall(
+            beat=beat,
+            stack=stack,
+            correlation_id=task_correlation_ids.get(task) if task else None,
+            task_name=task.get_name() if task else None,
+        )
+
+    def _record(self, stall: _Stall) -> None:
+        LOOP_STALLS.labels().inc()
+        logger.warning(
+            f"Event loop blocked for {stall.duration * 1000:.0f} ms "
+            f"(correlation_id={stall.correlation_id}, task={stall.task_name}) at "
+            f"{stall.stack[-1] if stall.stack else 'unknown'}"
+        )
+        with self._lock:
+            profile = self.profiles.get(stall.stack)
+            if profile is None:
+                profile = self.profiles[stall.stack] = _StackProfile(stall.stack)
+            profile.count += 1
+            profile.total += stall.duration
+            profile.worst = max(profile.worst, stall.duration)
+            if stall.correlation_id:
+                profile.correlation_ids = (profile.correlation_ids + [stall.correlation_id])[-10:]
+            if stall.task_name:
+                profile.task_names.add(stall.task_name)
+
+    def render(self) -> str:
+        with self._lock:
+            profiles = sorted(self.profiles.values(), key=lambda p: p.total, reverse=True)
+        blocks = []
+        for p in profiles:
+            header = (
+                f"{p.count} stalls, {p.total * 1000:.0f} ms total, {p.worst * 1000:.0f} ms worst\n"
+                f"  tasks: {', '.join(sorted(p.task_names)) or '-'}\n"
+                f"  recent correlation ids: {', '.join(p.correlation_ids) or '-'}"
+            )
+            blocks.append(header + "\n" + "\n".join(f"    {line}" for line in p.stack))
+        return "\n\n".join(blocks) + "\n"
+
+    def dump(self) -> None:
+        if not self.profiles:
+            return
+        try:
+            self.profile_path.parent.mkdir(parents=True, exist_ok=True)
+            self.profile_path.write_text(self.render())
+        except OSError:
+            logger.exception(f"Could not write loop stall profile to {self.profile_path}")
+
+
+def _inherit_correlation_id(loop, coro, **kwargs) -> asyncio.Task:
+    # Tasks spawned while handling a command inherit its correlation id, so a
+    # stall inside e.g. a create_task'd helper is still attributed to the command.
+    task = asyncio.Task(coro, loop=loop, **kwargs)
+    correlation_id = current_correlation_id.get()
+    if correlation_id:
+        task_correlation_ids[task] = correlation_id
+    return task
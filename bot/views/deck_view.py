@@ -1,55 +1,61 @@
+from typing import Sequence
+
 import discord
 from discord.ui import View, button
 
-MAX_CHARS_PER_PAGE = 1000 
+MAX_CHARS_PER_PAGE = 1000
 
 
 class DeckView(View):
-    def __init__(self, full_text: str):
+    def __init__(self, lines: Sequence[str]):
         super().__init__(timeout=60)
-        self.chunks = self._paginate_text(full_text)
+        self.lines = lines
+        self.pages = self._paginate(lines)
         self.index = 0
 
-    def _paginate_text(self, text: str) -> list[str]:
+    def _paginate(self, lines: Sequence[str]) -> list[tuple[int, int, str | None]]:
         """
-        Splits the full deck text into pages, keeping set headers and adding "(continued...)" if needed.
-        Adds space between sets for readability.
+        Splits the deck lines into pages as (start, end, continued header) spans; only
+        line lengths are measured here, each page's text is built when it is shown.
+        A page starting mid-set repeats the set header with "(continued...)", and set
+        headers get a blank line before them for readability.
         """
-        paragraphs = text.splitlines()
-        chunks = []
-        buffer = ""
-        current_header = ""
-
-        for line in paragraphs:
-            if not line.strip():
-                continue
+        pages = []
+        start, size, continued = 0, 0, None
+        current_header = None
 
+        for i, line in enumerate(lines):
             is_header = not line.startswith("•")
             if is_header:
-                line = "\n" + line
-                current_header = line.strip()
+                current_header = line
+            length = len(line) + is_header
 
-            preview = buffer + ("\n" if buffer else "") + line
-            if len(preview) > MAX_CHARS_PER_PAGE:
-                if buffer:
-                    chunks.append(buffer.strip())
-                if is_header:
-                    buffer = line
+            if size and size + 1 + length > MAX_CHARS_PER_PAGE:
+                pages.append((start, i, continued))
+                start = i
+                if is_header or current_header is None:
+                    size, continued = length, None
                 else:
-                    buffer = f"{current_header} (continued...)\n{line}"
+                    size, continued = len(current_header) + len(" (continued...)") + 1 + length, current_header
             else:
-                buffer = preview
+                size += (1 if size else 0) + length
+
+        if start < len(lines):
+            pages.append((start, len(lines), continued))
 
-        if buffer:
-            chunks.append(buffer.strip())
+        return pages
 
-        return chunks
+    def _page_text(self, index: int) -> str:
+        start, end, continued = self.pages[index]
+        parts = [f"{continued} (continued...)"] if continued else []
+        parts.extend(line if line.startswith("•") else "\n" + line for line in self.lines[start:end])
+        return "\n".join(parts).strip()
 
     @property
     def current_embed(self) -> discord.Embed:
         embed = discord.Embed(
-            title=f"📖 Your Pokémon Cards (Page {self.index + 1}/{len(self.chunks)})",
-            description=self.chunks[self.index],
+            title=f"📖 Your Pokémon Cards (Page {self.index + 1}/{len(self.pages)})",
+            description=self._page_text(self.index),
             color=discord.Color.blue()
         )
         return embed
@@ -64,7 +70,7 @@ class DeckView(View):
 
     @button(label="➡️ Next", style=discord.ButtonStyle.secondary)
     async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.index < len(self.chunks) - 1:
+        if self.index < len(self.pages) - 1:
             self.index += 1
             await interaction.response.edit_message(embed=self.current_embed, view=self)
         else:
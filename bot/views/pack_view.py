@@ -4,17 +4,26 @@ from typing import List
 
 
 class PackView(View):
-    def __init__(self, image_urls: List[str], set_name: str):
+    def __init__(
+        self,
+        image_urls: List[str],
+        set_name: str,
+        summary: str | None = None,
+        label: str = "Card",
+    ):
         super().__init__(timeout=60)
         self.image_urls = image_urls
         self.set_name = set_name
+        self.summary = summary
+        self.label = label
         self.index = 0
 
     def format_embed(self) -> discord.Embed:
         """Return an embed showing the current card image."""
         url = self.image_urls[self.index]
         embed = discord.Embed(
-            title=f"{self.set_name} – Card {self.index + 1}/{len(self.image_urls)}",
+            title=f"{self.set_name} – {self.label} {self.index + 1}/{len(self.image_urls)}",
+            description=self.summary,
             color=discord.Color.blue(),
         )
         embed.set_image(url=url)
@@ -48,7 +57,7 @@ class PackView(View):
         embeds: List[discord.Embed] = []
         for idx, url in enumerate(self.image_urls, start=1):
             embed = discord.Embed(
-                title=f"{self.set_name} – Card {idx}/{len(self.image_urls)}",
+                title=f"{self.set_name} – {self.label} {idx}/{len(self.image_urls)}",
                 color=discord.Color.green(),
             )
             embed.set_image(url=url)
@@ -57,8 +66,12 @@ class PackView(View):
         for child in self.children:
             child.disabled = True
 
+        if self.summary is None:
+            content = f"📦 Full **{self.set_name}** pack revealed!"
+        else:
+            content = f"📦 Top {self.label.lower()}s from **{self.set_name}** revealed!"
         await interaction.response.edit_message(
-            content=f"📦 Full **{self.set_name}** pack revealed!",
+            content=content,
             embeds=embeds[:10],  # Discord limit
             view=self,
         )
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+Batch = dict[str, dict[str, int]]  # discord_id -> card_id -> qty to add
+
+
+class WriteBehindBuffer:
+    """Collects card grants per player in memory and writes them in batches.
+
+    ``add`` never touches the database. A background task hands everything
+    collected to ``write`` every ``interval`` seconds, or as soon as
+    ``max_cards`` copies are waiting, and ``close`` writes whatever is left;
+    after that ``add`` refuses new grants, so callers write them directly.
+    ``write`` must only raise if the batch was not committed: a failed batch
+    is merged back and retried on the next tick.
+
+    Reads that combine the database with ``pending`` must hold ``reading()``:
+    a batch is only written while no reader holds it (and new readers wait for
+    the batch to land), so a reader never sees a grant both in the database
+    and in memory, or in neither.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[Batch], Awaitable[None]],
+        interval: float,
+        max_cards: int,
+    ):
+        self.write = write
+        self.interval = interval
+        self.max_cards = max_cards
+        self._pending: Batch = {}
+        self._pending_cards = 0
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._idle = asyncio.Event()  # set while no batch is being written
+        self._idle.set()
+        self._readers = 0
+        self._no_readers = asyncio.Event()
+        self._no_readers.set()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the timer and write everything still pending."""
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception(f"Could not write buffered cards on shutdown: {json.dumps(self._pending)}")
+            raise
+
+    def add(self, discord_id: str, cards: dict[str, int]) -> None:
+        if self._closed:
+            raise RuntimeError("WriteBehindBuffer is closed")
+        self._merge(discord_id, cards)
+
+    def _merge(self, discord_id: str, cards: dict[str, int]) -> None:
+        player = self._pending.setdefault(discord_id, {})
+        for card_id, qty in cards.items():
+            player[card_id] = player.get(card_id, 0) + qty
+        self._pending_cards += sum(cards.values())
+        if self._pending_cards >= self.max_cards:
+            self._full.set()
+
+    def has_pending(self, *discord_ids: str) -> bool:
+        return any(discord_id in self._pending for discord_id in discord_ids)
+
+    def pending(self, discord_id: str) -> dict[str, int]:
+        return dict(self._pending.get(discord_id, {}))
+
+    @asynccontextmanager
+    async def reading(self) -> AsyncIterator[None]:
+        # Re-checked after every wake-up: a batch may have started in between.
+        while not self._idle.is_set():
+            await self._idle.wait()
+        self._readers += 1
+        self._no_readers.clear()
+        try:
+            yield
+        finally:
+            self._readers -= 1
+            if not self._readers:
+                self._no_readers.set()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._idle.clear()
+            try:
+                await self._no_readers.wait()
+                batch, self._pending, self._pending_cards = self._pending, {}, 0
+                self._full.clear()
+                try:
+                    await self.write(batch)
+                except Exception:
+                    for discord_id, cards in batch.items():
+                        self._merge(discord_id, cards)
+                    raise
+            finally:
+                self._idle.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                # Shielded so close() never cancels a batch halfway through its write.
+                await asyncio.shield(self.flush())
+            except Exception:
+                logger.exception("Could not write buffered cards; retrying on the next flush")
+                await asyncio.sleep(self.interval)
@@ -1,77 +1,170 @@
+import argparse
 import json
+import math
 import os
+import shutil
+import sys
+import threading
 import time
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
-API_BASE = "https://api.pokemontcg.io/v2"
+try:
+    from catalog_format import write_catalog
+except ImportError:  # running from a checkout rather than the bot-base image
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "bot"))
+    from catalog_format import write_catalog
+
+API_BASE = os.getenv("POKEMON_TCG_API_BASE", "https://api.pokemontcg.io/v2")
 PAGE_SIZE = 250
+CARD_FIELDS = "id,name,supertype,subtypes,types,rarity,set,number,images"
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "4"))
+MAX_REQUESTS_PER_SEC = float(os.getenv("FETCH_MAX_RPS", "5"))
 
 API_KEY = os.getenv("POKEMON_TCG_API_KEY")
 HEADERS = {"X-Api-Key": API_KEY} if API_KEY else {}
 
 SCRIPT_DIR = os.path.dirname(__file__)
-DATA_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), "app", "data")
-os.makedirs(DATA_DIR, exist_ok=True)
+# /app/data in the bot-base image; --data-dir points an incremental sync at a running bot's copy.
+DEFAULT_DATA_DIR = os.getenv("FETCH_DATA_DIR", os.path.join(os.path.dirname(SCRIPT_DIR), "app", "data"))
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger(__name__)
 
-session = requests.Session()
 retries = Retry(
     total=3,
     connect=3,
     backoff_factor=1,
     status_forcelist=[404, 429, 500, 502, 503, 504],
 )
-adapter = HTTPAdapter(max_retries=retries)
-session.mount("https://", adapter)
-session.mount("http://", adapter)
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    # One session per worker thread; requests.Session isn't guaranteed thread-safe.
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+        adapter = HTTPAdapter(max_retries=retries)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+    return session
+
+
+class RateLimiter:
+    """Spaces requests at least 1/rate seconds apart across all threads."""
 
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
 
-def fetch_paginated(endpoint: str):
-    logger.info(f"Fetching paginated data from '{endpoint}'...")
-    all_items = []
-    page = 1
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+rate_limiter = RateLimiter(MAX_REQUESTS_PER_SEC)
+
+
+def api_get(path: str, params: dict | None = None) -> dict:
+    rate_limiter.wait()
+    resp = get_session().get(f"{API_BASE}/{path}", params=params, headers=HEADERS)
+    resp.raise_for_status()
+    return resp.json()
 
-    while True:
-        logger.info(f"  → Requesting page {page}...")
 
+class PageCheckpoint:
+    """Pages saved to disk as they arrive so an interrupted fetch can resume.
+
+    The manifest records what the pages were fetched for; if the API now reports
+    a different total (or page size / fields), the old pages are discarded.
+    """
+
+    def __init__(self, directory: str, name: str, total_count: int, query: str | None = None):
+        self.directory = os.path.join(directory, name)
+        manifest = {"total_count": total_count, "page_size": PAGE_SIZE, "select": CARD_FIELDS, "q": query}
+        manifest_path = os.path.join(self.directory, "manifest.json")
+
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                if json.load(f) != manifest:
+                    logger.info(f"    Checkpoint for '{name}' is stale — starting over.")
+                    shutil.rmtree(self.directory)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+    def _path(self, page: int) -> str:
+        return os.path.join(self.directory, f"page-{page:05d}.json")
+
+    def load(self, page: int) -> list | None:
         try:
-            resp = session.get(
-                f"{API_BASE}/{endpoint}",
-                params={"page": page, "pageSize": PAGE_SIZE , "select": "id,name,supertype,subtypes,types,rarity,set,number,images"},
-                headers=HEADERS,
-            )
-            resp.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            if resp.status_code == 404 and page > 1:
-                logger.info(f"    Page {page} returned 404 — assuming end of pages.")
-                break
-            logger.error(f"    HTTP error on page {page}: {e}")
-            raise
-
-        resp_json = resp.json()
-
-        if page == 1:
-            total_count = resp_json.get("totalCount", "unknown")
-            logger.info(f"    Total count reported: {total_count}")
-
-        data = resp_json.get("data", [])
-        if not data:
-            logger.info(f"    No data on page {page} — stopping.")
-            break
-
-        all_items.extend(data)
-        logger.info(f"    Collected {len(all_items)} total items so far...")
-
-        page += 1
-        time.sleep(0.1)
+            with open(self._path(page), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save(self, page: int, data: list):
+        # Write then rename so a kill mid-write never leaves a truncated page behind.
+        tmp = self._path(page) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self._path(page))
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def fetch_paginated(
+    endpoint: str, checkpoint_dir: str, query: str | None = None, checkpoint_name: str | None = None
+):
+    logger.info(f"Fetching paginated data from '{endpoint}'" + (f" where {query}" if query else "") + "...")
+    params = {"pageSize": PAGE_SIZE, "select": CARD_FIELDS}
+    if query:
+        params["q"] = query
+
+    # Page 1 also tells us how many pages there are.
+    first = api_get(endpoint, {**params, "page": 1})
+    total_count = first["totalCount"]
+    page_count = max(1, math.ceil(total_count / PAGE_SIZE))
+    logger.info(f"    Total count reported: {total_count} ({page_count} pages)")
+
+    checkpoint = PageCheckpoint(checkpoint_dir, checkpoint_name or endpoint, total_count, query)
+    checkpoint.save(1, first.get("data", []))
+    progress = threading.Lock()
+    done = 1
+
+    def fetch_page(page: int) -> list:
+        nonlocal done
+        data = checkpoint.load(page)
+        if data is None:
+            data = api_get(endpoint, {**params, "page": page}).get("data", [])
+            checkpoint.save(page, data)
+            source = "fetched"
+        else:
+            source = "restored from checkpoint"
+        with progress:
+            done += 1
+            logger.info(f"  → Page {page} {source} ({done}/{page_count})")
+        return data
+
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        pages = [first.get("data", [])] + list(pool.map(fetch_page, range(2, page_count + 1)))
+
+    all_items = [item for page in pages for item in page]
+    if len(all_items) != total_count:
+        logger.warning(f"    Expected {total_count} items but collected {len(all_items)}.")
 
     logger.info(f"Done fetching '{endpoint}' — total {len(all_items)} items.")
-    return all_items
+    return all_items, checkpoint
 
 
 def fetch_enums():
@@ -79,9 +172,7 @@ def fetch_enums():
     enums = {}
     for key in ["types", "supertypes", "subtypes", "rarities"]:
         logger.info(f"  → Fetching {key}...")
-        resp = session.get(f"{API_BASE}/{key}", headers=HEADERS)
-        resp.raise_for_status()
-        enums[key] = resp.json()["data"]
+        enums[key] = api_get(key)["data"]
         logger.info(f"    {key}: {len(enums[key])} items.")
     logger.info("Done fetching enums.")
     return enums
@@ -89,36 +180,117 @@ def fetch_enums():
 
 def fetch_sets():
     logger.info("Fetching sets...")
-    resp = session.get(f"{API_BASE}/sets", headers=HEADERS)
-    resp.raise_for_status()
-    sets = resp.json()["data"]
+    sets = api_get("sets")["data"]
     logger.info(f"Done fetching sets: {len(sets)} items.")
     return sets
 
 
-def save_json(data, filename):
-    path = os.path.join(DATA_DIR, filename)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+def load_json(data_dir, filename):
+    path = os.path.join(data_dir, filename)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def set_changed(old: dict | None, new: dict) -> bool:
+    if old is None:
+        return True
+    return any(old.get(key) != new.get(key) for key in ("updatedAt", "releaseDate", "total"))
+
+
+def sync_incremental(data_dir: str, checkpoint_dir: str):
+    """Refetch cards only for sets that are new or changed since the catalog saved in ``data_dir``."""
+    old_sets = load_json(data_dir, "sets.json")
+    old_cards = load_json(data_dir, "cards.json")
+    if old_sets is None or old_cards is None:
+        logger.info("No saved catalog to diff against — doing a full fetch.")
+        return fetch_all(checkpoint_dir)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        enums_future = pool.submit(fetch_enums)
+        sets = fetch_sets()
+        enums = enums_future.result()
+
+    old_by_id = {s["id"]: s for s in old_sets}
+    changed = [s for s in sets if set_changed(old_by_id.get(s["id"]), s)]
+    current_ids = {s["id"] for s in sets}
+    removed_ids = old_by_id.keys() - current_ids
+    changed_ids = {s["id"] for s in changed}
+    logger.info(f"{len(changed)} new or changed sets, {len(removed_ids)} removed.")
+
+    cards = [
+        card for card in old_cards
+        if (card.get("set") or {}).get("id") in current_ids - changed_ids
+    ]
+    checkpoints = []
+    for card_set in changed:
+        set_cards, checkpoint = fetch_paginated(
+            "cards", checkpoint_dir, query=f"set.id:{card_set['id']}", checkpoint_name=f"cards-{card_set['id']}"
+        )
+        cards.extend(set_cards)
+        checkpoints.append(checkpoint)
+
+    return cards, sets, enums, checkpoints
+
+
+def fetch_all(checkpoint_dir: str):
+    # Sets and enums are small; fetch them alongside the card pages.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        sets_future = pool.submit(fetch_sets)
+        enums_future = pool.submit(fetch_enums)
+        cards, checkpoint = fetch_paginated("cards", checkpoint_dir)
+        sets = sets_future.result()
+        enums = enums_future.result()
+    return cards, sets, enums, [checkpoint]
+
+
+def save_json(data, data_dir, filename):
+    path = os.path.join(data_dir, filename)
+    # Atomic replace: a running bot may reload the catalog from these files.
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
     logger.info(f"Saved {filename} to {path} ({len(data)} items)")
 
 
-def main():
-    logger.info("Starting fetch_cards.py...")
-    logger.info(f"Output directory: {DATA_DIR}")
-    cards = fetch_paginated("cards")
-    sets = fetch_sets()
-    enums = fetch_enums()
+def main(data_dir: str = DEFAULT_DATA_DIR, incremental: bool = False):
+    logger.info(f"Starting fetch_cards.py ({'incremental' if incremental else 'full'})...")
+    logger.info(f"Output directory: {data_dir}")
+    os.makedirs(data_dir, exist_ok=True)
+    checkpoint_dir = os.getenv("FETCH_CHECKPOINT_DIR", os.path.join(data_dir, ".pages"))
+    if incremental:
+        cards, sets, enums, checkpoints = sync_incremental(data_dir, checkpoint_dir)
+    else:
+        cards, sets, enums, checkpoints = fetch_all(checkpoint_dir)
 
-    save_json(cards, "cards.json")
-    save_json(sets, "sets.json")
-    save_json(enums, "enums.json")
+    # catalog.bin last: the bot loads it in preference to the JSON once it exists.
+    save_json(sets, data_dir, "sets.json")
+    save_json(enums, data_dir, "enums.json")
+    save_json(cards, data_dir, "cards.json")
+    size = write_catalog(os.path.join(data_dir, "catalog.bin"), sets, cards)
+    logger.info(f"Saved catalog.bin ({size / 1e6:.1f} MB)")
+    for checkpoint in checkpoints:
+        checkpoint.clear()
     logger.info("All data fetched and saved successfully.")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--data-dir",
+        default=DEFAULT_DATA_DIR,
+        help="where the catalog files are read and written (default: %(default)s, or $FETCH_DATA_DIR)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only refetch cards for sets that are new or changed since the saved catalog",
+    )
+    args = parser.parse_args()
     try:
-        main()
+        main(args.data_dir, args.incremental)
     except Exception as e:
         logger.error(f"ERROR: {e}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,139 @@
+"""fetch_cards.py against a local stub of the pokemontcg.io API.
+
+    python -m unittest discover docker/bot-base/tests
+"""
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+SCRIPT = REPO_ROOT / "docker" / "bot-base" / "scripts" / "fetch_cards.py"
+sys.path.insert(0, str(REPO_ROOT / "tools" / "bench"))
+
+from synthetic import make_cards, make_sets  # noqa: E402
+
+SETS = make_sets(6)
+CARDS = make_cards(SETS, cards_per_set=200)  # 1200 cards -> 5 pages of 250
+ENUMS = {"types": ["Fire"], "supertypes": ["Pokémon"], "subtypes": ["Basic"], "rarities": ["Common"]}
+
+
+class StubAPI:
+    """Serves /cards pages, /sets and the enum endpoints, recording every card page request."""
+
+    def __init__(self):
+        self.page_requests: list[int] = []
+        self.fail_pages: set[int] = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                endpoint = url.path.rsplit("/", 1)[-1]
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if endpoint == "cards":
+                    status, body = api.cards_page(int(params["page"]), int(params["pageSize"]))
+                elif endpoint == "sets":
+                    status, body = 200, {"data": SETS}
+                else:
+                    status, body = 200, {"data": ENUMS[endpoint]}
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v2"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def cards_page(self, page: int, page_size: int) -> tuple[int, dict]:
+        with self.lock:
+            self.page_requests.append(page)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.05)  # long enough for the workers' requests to overlap
+            if page in self.fail_pages:
+                # 400 isn't retried, so the injected failure surfaces immediately.
+                return 400, {"error": "injected failure"}
+            start = (page - 1) * page_size
+            return 200, {"data": CARDS[start:start + page_size], "totalCount": len(CARDS)}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def load_fetch_cards(api_url: str):
+    os.environ.update(POKEMON_TCG_API_BASE=api_url, FETCH_WORKERS="4", FETCH_MAX_RPS="0")
+    os.environ.pop("FETCH_CHECKPOINT_DIR", None)
+    spec = importlib.util.spec_from_file_location("fetch_cards", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FetchCardsTest(unittest.TestCase):
+    def setUp(self):
+        self.api = StubAPI()
+        self.addCleanup(self.api.server.server_close)
+        self.addCleanup(self.api.server.shutdown)
+        self.fetch_cards = load_fetch_cards(self.api.url)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.data_dir = tmp.name
+
+    def saved_cards(self) -> list[dict]:
+        with open(os.path.join(self.data_dir, "cards.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_fetches_every_page_concurrently(self):
+        self.fetch_cards.main(self.data_dir)
+
+        self.assertEqual(sorted(self.api.page_requests), [1, 2, 3, 4, 5])
+        self.assertGreater(self.api.max_in_flight, 1)
+        self.assertEqual([card["id"] for card in self.saved_cards()], [card["id"] for card in CARDS])
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, "catalog.bin")))
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, ".pages", "cards")))
+
+    def test_page_count_comes_from_total_count(self):
+        checkpoint_dir = os.path.join(self.data_dir, ".pages")
+        cards, _ = self.fetch_cards.fetch_paginated("cards", checkpoint_dir)
+
+        self.assertEqual(len(cards), len(CARDS))
+        self.assertEqual(len(self.api.page_requests), -(-len(CARDS) // self.fetch_cards.PAGE_SIZE))
+
+    def test_resumes_from_checkpoint_after_failure(self):
+        self.api.fail_pages = {4}
+        with self.assertRaises(Exception):
+            self.fetch_cards.main(self.data_dir)
+        first_run = set(self.api.page_requests)
+        self.assertIn(4, first_run)
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, "cards.json")))
+
+        self.api.fail_pages = set()
+        self.api.page_requests.clear()
+        self.fetch_cards.main(self.data_dir)
+
+        # Page 1 is always refetched for totalCount; only the failed page is fetched again.
+        self.assertEqual(sorted(self.api.page_requests), [1, 4])
+        self.assertEqual([card["id"] for card in self.saved_cards()], [card["id"] for card in CARDS])
+
+
+if __name__ == "__main__":
+    unittest.main()
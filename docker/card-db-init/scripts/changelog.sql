@@ -5,3 +5,161 @@ CREATE TABLE player_cards (
     discord_id TEXT PRIMARY KEY,
     cards JSONB NOT NULL
 );
+
+-- changeset bot:create-player-card-inventory-table
+CREATE TABLE player_card_inventory (
+    discord_id TEXT NOT NULL,
+    card_id TEXT NOT NULL,
+    qty INTEGER NOT NULL CHECK (qty >= 0),
+    PRIMARY KEY (discord_id, card_id)
+);
+-- rollback DROP TABLE player_card_inventory;
+
+-- changeset bot:migrate-player-cards-to-inventory
+INSERT INTO player_card_inventory (discord_id, card_id, qty)
+SELECT pc.discord_id, c.key, c.value::INTEGER
+FROM player_cards pc, jsonb_each_text(pc.cards) AS c
+WHERE c.value::INTEGER > 0;
+-- rollback DELETE FROM player_card_inventory;
+
+-- changeset bot:create-trade-offers-table
+CREATE TABLE trade_offers (
+    message_id BIGINT PRIMARY KEY,
+    channel_id BIGINT NOT NULL,
+    initiator_id TEXT NOT NULL,
+    target_id TEXT NOT NULL,
+    give_card_id TEXT NOT NULL,
+    get_card_id TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+CREATE INDEX trade_offers_expires_at ON trade_offers (expires_at);
+-- rollback DROP TABLE trade_offers;
+
+-- changeset bot:create-catalog-reference-tables
+-- Filled and kept current by the bot (db.sync_catalog) from the catalog it loads.
+CREATE TABLE card_set (
+    set_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    series TEXT,
+    release_date TEXT,
+    card_count INTEGER NOT NULL
+);
+CREATE TABLE catalog_card (
+    card_id TEXT PRIMARY KEY,
+    set_id TEXT NOT NULL REFERENCES card_set (set_id),
+    name TEXT NOT NULL,
+    rarity TEXT,
+    rarity_tier TEXT,
+    is_hit BOOLEAN NOT NULL
+);
+CREATE INDEX catalog_card_set_id ON catalog_card (set_id);
+CREATE TABLE catalog_version (
+    singleton BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (singleton),
+    version TEXT NOT NULL
+);
+-- rollback DROP TABLE catalog_version; DROP TABLE catalog_card; DROP TABLE card_set;
+
+-- changeset bot:create-collection-stats-tables
+CREATE TABLE player_stats (
+    discord_id TEXT PRIMARY KEY,
+    total_cards BIGINT NOT NULL,
+    unique_cards INTEGER NOT NULL,
+    hit_cards BIGINT NOT NULL
+);
+CREATE INDEX player_stats_total_cards ON player_stats (total_cards DESC);
+CREATE INDEX player_stats_unique_cards ON player_stats (unique_cards DESC);
+CREATE INDEX player_stats_hit_cards ON player_stats (hit_cards DESC);
+CREATE TABLE player_set_progress (
+    discord_id TEXT NOT NULL,
+    set_id TEXT NOT NULL,
+    owned_unique INTEGER NOT NULL,
+    PRIMARY KEY (discord_id, set_id)
+);
+CREATE INDEX player_set_progress_leaders ON player_set_progress (set_id, owned_unique DESC);
+-- rollback DROP TABLE player_set_progress; DROP TABLE player_stats;
+
+-- changeset bot:create-collection-stats-functions splitStatements:false
+-- Adds per-card quantity / ownership deltas to player_stats and player_set_progress.
+CREATE FUNCTION apply_inventory_deltas(
+    discord_ids TEXT[], card_ids TEXT[], qty_deltas INTEGER[], unique_deltas INTEGER[]
+) RETURNS void LANGUAGE sql AS $$
+    INSERT INTO player_stats AS s (discord_id, total_cards, unique_cards, hit_cards)
+    SELECT d.discord_id,
+           SUM(d.qty_delta),
+           SUM(d.unique_delta),
+           COALESCE(SUM(d.qty_delta) FILTER (WHERE c.is_hit), 0)
+    FROM unnest(discord_ids, card_ids, qty_deltas, unique_deltas) AS d(discord_id, card_id, qty_delta, unique_delta)
+    LEFT JOIN catalog_card c ON c.card_id = d.card_id
+    GROUP BY d.discord_id
+    ON CONFLICT (discord_id) DO UPDATE SET
+        total_cards = s.total_cards + EXCLUDED.total_cards,
+        unique_cards = s.unique_cards + EXCLUDED.unique_cards,
+        hit_cards = s.hit_cards + EXCLUDED.hit_cards;
+
+    INSERT INTO player_set_progress AS p (discord_id, set_id, owned_unique)
+    SELECT d.discord_id, c.set_id, SUM(d.unique_delta)
+    FROM unnest(discord_ids, card_ids, unique_deltas) AS d(discord_id, card_id, unique_delta)
+    JOIN catalog_card c ON c.card_id = d.card_id
+    WHERE d.unique_delta <> 0
+    GROUP BY d.discord_id, c.set_id
+    ON CONFLICT (discord_id, set_id) DO UPDATE SET owned_unique = p.owned_unique + EXCLUDED.owned_unique;
+$$;
+
+-- Statement-level, so a multi-card upsert updates each player's stats once.
+CREATE FUNCTION player_card_inventory_stats() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM apply_inventory_deltas(
+            array_agg(discord_id), array_agg(card_id), array_agg(qty), array_agg((qty > 0)::int)
+        ) FROM new_rows;
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM apply_inventory_deltas(
+            array_agg(n.discord_id), array_agg(n.card_id), array_agg(n.qty - o.qty),
+            array_agg((n.qty > 0)::int - (o.qty > 0)::int)
+        ) FROM new_rows n JOIN old_rows o ON o.discord_id = n.discord_id AND o.card_id = n.card_id;
+    ELSE
+        PERFORM apply_inventory_deltas(
+            array_agg(discord_id), array_agg(card_id), array_agg(-qty), array_agg(-(qty > 0)::int)
+        ) FROM old_rows;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER player_card_inventory_stats_insert
+    AFTER INSERT ON player_card_inventory
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION player_card_inventory_stats();
+CREATE TRIGGER player_card_inventory_stats_update
+    AFTER UPDATE ON player_card_inventory
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION player_card_inventory_stats();
+CREATE TRIGGER player_card_inventory_stats_delete
+    AFTER DELETE ON player_card_inventory
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION player_card_inventory_stats();
+
+-- Recomputes every aggregate from the inventory; run when the catalog changes.
+CREATE FUNCTION rebuild_collection_stats() RETURNS void LANGUAGE sql AS $$
+    LOCK TABLE player_card_inventory IN SHARE MODE;
+    DELETE FROM player_set_progress;
+    DELETE FROM player_stats;
+
+    INSERT INTO player_stats (discord_id, total_cards, unique_cards, hit_cards)
+    SELECT i.discord_id,
+           SUM(i.qty),
+           COUNT(*) FILTER (WHERE i.qty > 0),
+           COALESCE(SUM(i.qty) FILTER (WHERE c.is_hit), 0)
+    FROM player_card_inventory i
+    LEFT JOIN catalog_card c ON c.card_id = i.card_id
+    GROUP BY i.discord_id;
+
+    INSERT INTO player_set_progress (discord_id, set_id, owned_unique)
+    SELECT i.discord_id, c.set_id, COUNT(*)
+    FROM player_card_inventory i
+    JOIN catalog_card c ON c.card_id = i.card_id
+    WHERE i.qty > 0
+    GROUP BY i.discord_id, c.set_id;
+$$;
+-- rollback DROP TRIGGER player_card_inventory_stats_insert ON player_card_inventory; DROP TRIGGER player_card_inventory_stats_update ON player_card_inventory; DROP TRIGGER player_card_inventory_stats_delete ON player_card_inventory; DROP FUNCTION player_card_inventory_stats(); DROP FUNCTION apply_inventory_deltas(TEXT[], TEXT[], INTEGER[], INTEGER[]); DROP FUNCTION rebuild_collection_stats();
@@ -0,0 +1,58 @@
+"""QueryEngine against a synthetic catalog.
+
+    python -m unittest discover tests
+"""
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "tools" / "bench"))
+
+from synthetic import make_sets, write_dataset  # noqa: E402
+
+from bot.catalog import load_catalog_json  # noqa: E402
+from bot.query_engine import QueryEngine  # noqa: E402
+
+EMPTY_SET = "Upcoming Expansion"
+
+
+def load_catalog_with_empty_set():
+    with tempfile.TemporaryDirectory() as tmp:
+        write_dataset(tmp, n_sets=3, cards_per_set=40)
+        # A set sets.json already lists but that has no cards yet.
+        sets_path = Path(tmp) / "sets.json"
+        sets = json.loads(sets_path.read_text(encoding="utf-8"))
+        sets.append({**make_sets(4)[3], "id": "upcoming", "name": EMPTY_SET})
+        sets_path.write_text(json.dumps(sets), encoding="utf-8")
+        return load_catalog_json(Path(tmp))
+
+
+class QueryEngineTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = QueryEngine(load_catalog_with_empty_set())
+
+    def test_counts_cards_in_set(self):
+        self.assertEqual(
+            self.engine.answer("How many cards are in Synthetic Set 1?"), "➤ **Synthetic Set 1** → **40** cards"
+        )
+
+    def test_set_without_cards(self):
+        self.assertEqual(
+            self.engine.answer(f"how many cards are in {EMPTY_SET}"), f"➤ **{EMPTY_SET}** → **0** cards"
+        )
+        # Nothing to list, so these go to the agent rather than raising.
+        self.assertIsNone(self.engine.answer(f"list pikachu cards in {EMPTY_SET}"))
+        self.assertIsNone(self.engine.answer(f"show rare cards in {EMPTY_SET}"))
+        self.assertIn(EMPTY_SET, self.engine.answer(f"legalities of {EMPTY_SET}"))
+
+    def test_unparsed_qualifiers_go_to_the_agent(self):
+        self.assertIsNone(self.engine.answer("how many cards are in Synthetic Set 1 released after 2020"))
+
+
+if __name__ == "__main__":
+    unittest.main()
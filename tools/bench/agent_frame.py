@@ -0,0 +1,98 @@
+"""Memory and query speed of the /agent DataFrame: old all-object frame vs the schema'd one.
+
+    python tools/bench/agent_frame.py --data-dir /app/data
+
+"before" is the frame AgentCog used to build (every column a Python object,
+subtypes/types as JSON strings); "after" is bot.card_frame.build_card_frame.
+The queries mirror the examples in the agent prompt.
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import benchenv
+
+benchenv.configure()
+
+import pandas as pd  # noqa: E402
+
+from bot.card_frame import build_card_frame  # noqa: E402
+from bot.catalog import load_catalog  # noqa: E402
+
+
+def legacy_frame(catalog) -> pd.DataFrame:
+    rows = [
+        {
+            "id": card.id,
+            "name": card.name,
+            "supertype": card.supertype,
+            "subtypes": json.dumps(list(card.subtypes)),
+            "types": json.dumps(list(card.types)),
+            "rarity": card.rarity,
+            "number": card.number,
+            "set_name": card.set.name,
+            "set_series": card.set.series,
+            "set_total": card.set.total,
+            "set_printedTotal": card.set.printed_total,
+            "set_releaseDate": card.set.release_date,
+            "set_ptcgoCode": card.set.ptcgo_code,
+            "set_legalities_unlimited": card.set.legalities_unlimited,
+            "set_legalities_expanded": card.set.legalities_expanded,
+            "images_small": card.image_small,
+            "images_large": card.image_large,
+        }
+        for card in catalog.cards
+    ]
+    return pd.DataFrame.from_records(rows)
+
+
+def queries(df: pd.DataFrame, set_name: str, rarity: str):
+    return {
+        "name contains": lambda: df[df["name"].str.contains("Pikachu", case=False, na=False)][["name", "set_name", "rarity"]],
+        "set + rarity": lambda: df[(df["set_name"] == set_name) & (df["rarity"] == rarity)][["name", "rarity"]],
+        "count per set": lambda: df.groupby("set_name")["name"].count().sort_values(ascending=False),
+        "sets with name": lambda: df[df["name"].str.contains("Charizard", case=False, na=False)]["set_name"].value_counts(),
+        "oldest set": lambda: df[df["set_name"] == df.sort_values("set_releaseDate").iloc[0]["set_name"]][["name", "images_large"]],
+        "released since": lambda: df[df["set_releaseDate"] > "2020-01-01"][["name", "set_name"]],
+        "type contains": lambda: df[df["types"].str.contains("Fire", na=False)][["name", "types"]],
+    }
+
+
+def bench(label: str, build, catalog, repeat: int) -> None:
+    start = time.perf_counter()
+    df = build(catalog)
+    built = time.perf_counter() - start
+    mib = df.memory_usage(deep=True).sum() / 2**20
+    print(f"{label}: built in {built * 1000:.0f} ms, {mib:.1f} MiB deep, {len(df.columns)} columns")
+
+    first = catalog.cards[0]
+    for name, query in queries(df, first.set.name, first.rarity or "Common").items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            query()
+            timings.append(time.perf_counter() - start)
+        print(f"    {name:>15}: {min(timings) * 1000:7.2f} ms")
+
+
+def main(data_dir: Path | None, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        if data_dir is None:
+            from synthetic import write_dataset
+
+            data_dir = Path(tmp)
+            write_dataset(str(data_dir))
+        catalog = load_catalog(data_dir)
+
+    bench("before", legacy_frame, catalog, repeat)
+    bench(" after", build_card_frame, catalog, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", type=Path)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.data_dir, args.repeat)
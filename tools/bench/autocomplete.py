@@ -0,0 +1,93 @@
+"""Autocomplete latency over every card name in the catalog.
+
+    python tools/bench/autocomplete.py --data-dir /app/data --queries 5000
+
+"before" is the substring scan with .lower() per candidate that the set and
+trade autocompletes used; "after" is SearchIndex.search with its query cache
+cleared first, so every query pays the full lookup. Queries are prefixes of
+real names as they'd be typed, plus some with a typo. The synthetic catalog
+has few distinct names, so without --data-dir names are generated instead.
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+
+import benchenv
+
+benchenv.configure()
+
+from bot.catalog import load_catalog  # noqa: E402
+from bot.search_index import SearchIndex  # noqa: E402
+
+SYLLABLES = ["pi", "ka", "chu", "char", "iz", "ard", "bul", "ba", "saur", "squir", "tle", "mew",
+             "two", "ee", "vee", "gen", "gar", "snor", "lax", "lu", "ca", "rio", "de", "voir", "flab", "é", "bé"]
+SUFFIXES = ["", "", "", " ex", " V", " GX", " VMAX", " VSTAR"]
+
+
+def generated_names(count: int, rng: random.Random) -> dict[str, int]:
+    names = {}
+    while len(names) < count:
+        base = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        names[base + rng.choice(SUFFIXES)] = rng.randint(1, 40)
+    return names
+
+
+def make_queries(names: list[str], count: int, rng: random.Random) -> list[str]:
+    queries = []
+    for _ in range(count):
+        name = rng.choice(names)
+        query = name[:rng.randint(0, len(name))]
+        if len(query) > 4 and rng.random() < 0.2:
+            i = rng.randrange(len(query) - 1)
+            query = query[:i] + query[i + 1] + query[i] + query[i + 2:]
+        queries.append(query)
+    return queries
+
+
+def legacy(names: list[str], current: str) -> list[str]:
+    return [name for name in names if current.lower() in name.lower()][:25]
+
+
+def measure(label: str, search, queries: list[str]) -> None:
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        samples.append((time.perf_counter() - start) * 1e3)
+    print(
+        f"{label:>6}: p50 {benchenv.percentile(samples, 50):.3f} ms, "
+        f"p99 {benchenv.percentile(samples, 99):.3f} ms, max {max(samples):.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", type=Path)
+    parser.add_argument("--names", type=int, default=12000, help="generated names without --data-dir")
+    parser.add_argument("--queries", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    if args.data_dir:
+        catalog = load_catalog(args.data_dir)
+        popularity = {name: len(cards) for name, cards in catalog.by_name.items()}
+    else:
+        popularity = generated_names(args.names, rng)
+    names = list(popularity)
+
+    start = time.perf_counter()
+    index = SearchIndex(((name, name) for name in names), popularity)
+    print(f"{len(names)} names, index built in {time.perf_counter() - start:.2f} s")
+
+    def uncached(query):
+        index._cache.clear()
+        return index.search(query)
+
+    queries = make_queries(names, args.queries, rng)
+    measure("before", lambda query: legacy(names, query), queries)
+    measure("after", uncached, queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Shared setup for benchmarks that import the bot package.
+
+``bot.settings`` requires the full set of environment variables, so fill in
+local-development defaults (matching docker-compose.yml) before importing it.
+"""
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+LOCAL_DEFAULTS = {
+    "DISCORD_BOT_TOKEN": "bench",
+    "OPENAI_API_KEY": "bench",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "cards",
+    "DB_USER": "postgres",
+    "DB_PASSWORD": "postgres",
+}
+
+
+def configure() -> None:
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    for key, value in LOCAL_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
@@ -0,0 +1,122 @@
+"""Compares resident memory of the per-cog cards.json loads against the shared catalog.
+
+    python tools/bench/catalog_memory.py --data-dir /app/data
+
+Each scenario runs in a fresh interpreter so the numbers don't contaminate each other.
+Without --data-dir a synthetic catalog is generated into a temp directory.
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+def rss_mib() -> float:
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmRSS not available")
+
+
+def has_pandas() -> bool:
+    try:
+        import pandas  # noqa: F401
+        import pandasai  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def scenario_before(data_dir: Path) -> list:
+    def load():
+        with open(data_dir / "cards.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    keep = []
+    # OpenPackCog
+    open_pack_cards = load()
+    set_to_cards = {}
+    for card in open_pack_cards:
+        set_to_cards.setdefault(card["set"]["name"], []).append(card)
+    keep += [open_pack_cards, set_to_cards]
+    # ShowCardsCog and TradeCardCog
+    for _ in range(2):
+        cards = load()
+        keep += [cards, {card["id"]: card for card in cards}]
+    # AgentCog
+    agent_cards = load()
+    if has_pandas():
+        import pandas as pd
+
+        df = pd.json_normalize(agent_cards, sep="_")
+        for col in df.columns:
+            if df[col].dtype == object:
+                sample = df[col].dropna().iloc[0] if not df[col].dropna().empty else None
+                if isinstance(sample, (list, dict)):
+                    df[col] = df[col].apply(lambda x: json.dumps(x) if isinstance(x, (list, dict)) else x)
+        keep.append(df)
+    return keep
+
+
+def scenario_after(data_dir: Path) -> list:
+    sys.path.insert(0, str(Path(__file__).parent))
+    import benchenv
+
+    benchenv.configure()
+    from bot.catalog import load_catalog
+
+    catalog = load_catalog(data_dir)
+    keep = [catalog]
+    if has_pandas():
+        from bot.card_frame import build_card_frame
+
+        keep.append(build_card_frame(catalog))
+    return keep
+
+
+def run_scenario(name: str, data_dir: Path) -> None:
+    scenarios = {"before": scenario_before, "after": scenario_after}
+    gc.collect()
+    baseline = rss_mib()
+    keep = scenarios[name](data_dir)
+    gc.collect()
+    print(json.dumps({"scenario": name, "rss_mib": round(rss_mib() - baseline, 1), "objects": len(keep)}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", type=Path)
+    parser.add_argument("--scenario", choices=["before", "after"])
+    args = parser.parse_args()
+
+    if args.scenario:
+        run_scenario(args.scenario, args.data_dir)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            sys.path.insert(0, str(Path(__file__).parent))
+            from synthetic import write_dataset
+
+            data_dir = Path(tmp)
+            write_dataset(str(data_dir))
+
+        for name in ("before", "after"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--scenario", name, "--data-dir", str(data_dir)],
+                check=True,
+                capture_output=True,
+                text=True,
+                env={**os.environ, "PYTHONHASHSEED": "0"},
+            )
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{name:>6}: {result['rss_mib']:8.1f} MiB above interpreter baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Cold-start time and RSS of loading the catalog from JSON vs catalog.bin.
+
+    python tools/bench/catalog_startup.py --data-dir /app/data
+
+Each scenario runs in a fresh interpreter. Without --data-dir a synthetic
+catalog is generated (pretty-printed, like the old fetch step wrote it).
+catalog.bin is written into the data directory if it isn't there yet.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import benchenv
+
+benchenv.configure()
+
+
+def rss_mib() -> float:
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmRSS not available")
+
+
+def run_scenario(name: str, data_dir: Path) -> None:
+    from bot import catalog
+
+    loader = {"json": catalog.load_catalog_json, "bin": catalog.load_catalog_bin}[name]
+    baseline = rss_mib()
+    start = time.perf_counter()
+    loaded = loader(data_dir)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "seconds": elapsed,
+        "rss_mib": round(rss_mib() - baseline, 1),
+        "cards": len(loaded),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", type=Path)
+    parser.add_argument("--scenario", choices=["json", "bin"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.scenario:
+        run_scenario(args.scenario, args.data_dir)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            from synthetic import write_dataset
+
+            data_dir = Path(tmp)
+            write_dataset(str(data_dir))
+
+        if not (data_dir / "catalog.bin").exists():
+            from bot.catalog_format import write_catalog
+
+            sets = json.loads((data_dir / "sets.json").read_text(encoding="utf-8"))
+            cards = json.loads((data_dir / "cards.json").read_text(encoding="utf-8"))
+            write_catalog(str(data_dir / "catalog.bin"), sets, cards)
+
+        for name, filename in (("json", "cards.json"), ("bin", "catalog.bin")):
+            runs = []
+            for _ in range(args.repeat):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--scenario", name, "--data-dir", str(data_dir)],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                    env={**os.environ, "PYTHONHASHSEED": "0"},
+                )
+                runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+            best = min(runs, key=lambda r: r["seconds"])
+            size = (data_dir / filename).stat().st_size / 2**20
+            print(
+                f"{name:>4}: {best['seconds'] * 1000:7.0f} ms, {best['rss_mib']:6.1f} MiB RSS "
+                f"({best['cards']} cards, {filename} {size:.1f} MiB)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Cost of one logger.info call on the calling thread.
+
+    python tools/bench/logging_overhead.py --records 200000
+
+"before" is the old StreamHandler + json.dumps formatter writing synchronously;
+"after" is setup_logging's queue handler with the batching writer thread.
+"sampled" adds a 10% sample rate for the benchmark's logger.
+Output goes to /dev/null so the numbers measure logging, not the terminal;
+--write-delay-us simulates a slow consumer (e.g. a backed-up container log pipe).
+"""
+import argparse
+import logging
+import os
+import time
+
+import benchenv
+
+benchenv.configure()
+
+from bot.utils import logging_utils  # noqa: E402
+from bot.utils.logging_utils import ContextInjectingFormatter, setup_logging  # noqa: E402
+
+logger = logging.getLogger("bench.logging")
+
+
+class SlowStream:
+    def __init__(self, stream, delay: float):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, text: str) -> None:
+        time.sleep(self.delay)
+        self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def legacy_setup(stream) -> None:
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(ContextInjectingFormatter("%(message)s"))
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.handlers.clear()
+    root.addHandler(handler)
+
+
+def run(label: str, records: int) -> None:
+    logging_utils.current_correlation_id.set("bench")
+    start = time.perf_counter()
+    for i in range(records):
+        logger.info(f"[END] open_pack - {i} sec")
+    emitted = time.perf_counter() - start
+    if logging_utils._writer is not None:
+        logging_utils._writer.stop()
+        logging_utils._writer = None
+    drained = time.perf_counter() - start
+    print(
+        f"{label:>8}: {emitted / records * 1e6:6.2f} µs/call on caller, "
+        f"{drained / records * 1e6:6.2f} µs/call until written"
+    )
+
+
+def main(records: int, write_delay_us: float) -> None:
+    print(f"JSON encoder: {'orjson' if logging_utils.orjson else 'json'}")
+    with open(os.devnull, "w") as null:
+        devnull = SlowStream(null, write_delay_us / 1e6) if write_delay_us else null
+        legacy_setup(devnull)
+        run("before", records)
+        setup_logging(stream=devnull)
+        run("after", records)
+        setup_logging({"bench": 0.1}, stream=devnull)
+        run("sampled", records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--write-delay-us", type=float, default=0)
+    args = parser.parse_args()
+    main(args.records, args.write_delay_us)
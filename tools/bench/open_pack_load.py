@@ -0,0 +1,75 @@
+"""Load test for the async data layer against a local Postgres.
+
+    docker compose up -d card-db card-db-init
+    DB_HOST=localhost python tools/bench/open_pack_load.py --concurrency 100 --rounds 5
+
+Fires ``--concurrency`` simulated /open_pack writes at once while a probe task
+measures how long the event loop takes to service another interaction.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import benchenv
+from benchenv import percentile
+
+benchenv.configure()
+
+from bot import db  # noqa: E402
+
+CARD_IDS = [f"bench{s}-{n}" for s in range(20) for n in range(1, 121)]
+
+
+async def open_pack(discord_id: str, latencies: list[float]) -> None:
+    pack: dict[str, int] = {}
+    for card_id in random.sample(CARD_IDS, 10):
+        pack[card_id] = pack.get(card_id, 0) + 1
+    start = time.perf_counter()
+    await db.add_cards(discord_id, pack)
+    latencies.append(time.perf_counter() - start)
+
+
+async def probe(stop: asyncio.Event, lags: list[float], interval: float = 0.01) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def main(concurrency: int, rounds: int, users: int) -> None:
+    await db.open_pool()
+    latencies: list[float] = []
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(stop, lags))
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(
+            open_pack(f"bench-user-{random.randrange(users)}", latencies)
+            for _ in range(concurrency)
+        ))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe_task
+    await db.DB_POOL.close()
+
+    ms = lambda v: f"{v * 1000:8.2f} ms"  # noqa: E731
+    print(f"open_pack calls:   {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.0f}/s)")
+    print(f"open_pack p50:     {ms(statistics.median(latencies))}")
+    print(f"open_pack p99:     {ms(percentile(latencies, 99))}")
+    print(f"loop lag p50:      {ms(statistics.median(lags))}")
+    print(f"loop lag p99:      {ms(percentile(lags, 99))}")
+    print(f"loop lag max:      {ms(max(lags))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.rounds, args.users))
@@ -0,0 +1,80 @@
+"""Microbenchmark for drawing /open_pack packs.
+
+    python tools/bench/pack_sampling.py --data-dir /app/data --packs 20000
+
+"before" re-categorizes the set and expands the weighted rare pool on every
+pack, as OpenPackCog used to; "after" draws from the precomputed SetPool.
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import benchenv
+
+benchenv.configure()
+
+from bot.catalog import load_catalog  # noqa: E402
+from bot.packs import RARE_SLOT_TIERS, RARITY_TIERS, build_set_pools  # noqa: E402
+
+
+def legacy_categorize(cards):
+    categorized = defaultdict(list)
+    for card in cards:
+        rarity = (card.rarity or "").lower()
+        for tier, data in RARITY_TIERS.items():
+            if rarity in {r.lower() for r in data["names"]}:
+                categorized[tier].append(card)
+                break
+    return categorized
+
+
+def legacy_draw(cards):
+    pools = legacy_categorize(cards)
+    pack = random.sample(pools["common"], 5) + random.sample(pools["uncommon"], 3)
+    pack.append(random.choice(cards))
+    weighted = []
+    for tier in RARE_SLOT_TIERS:
+        weighted.extend(pools.get(tier, []) * RARITY_TIERS[tier]["weight"])
+    if weighted:
+        pack.append(random.choice(weighted))
+    return pack
+
+
+def run(label: str, draw, set_names: list[str], packs: int) -> float:
+    start = time.perf_counter()
+    for i in range(packs):
+        draw(set_names[i % len(set_names)])
+    rate = packs / (time.perf_counter() - start)
+    print(f"{label:>6}: {rate:12,.0f} packs/sec")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", type=Path)
+    parser.add_argument("--packs", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            sys.path.insert(0, str(Path(__file__).parent))
+            from synthetic import write_dataset
+
+            data_dir = Path(tmp)
+            write_dataset(str(data_dir))
+        catalog = load_catalog(data_dir)
+
+    pools = build_set_pools(catalog)
+    set_names = sorted(pools)
+    before = run("before", lambda name: legacy_draw(list(catalog.by_set[name])), set_names, args.packs)
+    after = run("after", lambda name: pools[name].draw_pack(), set_names, args.packs)
+    print(f"speedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
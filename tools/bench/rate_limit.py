@@ -0,0 +1,67 @@
+"""Decisions/sec for the Redis rate limiter against a local redis-server.
+
+    redis-server --port 6379 &
+    python tools/bench/rate_limit.py --decisions 20000 --concurrency 50
+
+"legacy" is the old INCR + EXPIRE (+ TTL on rejection) sequence for comparison.
+"""
+import argparse
+import asyncio
+import time
+
+import benchenv
+
+benchenv.configure()
+
+from bot.utils.rate_limit import check_rate_limit  # noqa: E402
+from bot.utils.redis_client import redis_client  # noqa: E402
+
+
+async def legacy(key: str, limit: int, period: int) -> bool:
+    current = await redis_client.incr(key)
+    if current == 1:
+        await redis_client.expire(key, period)
+    if current > limit:
+        await redis_client.ttl(key)
+        return False
+    return True
+
+
+async def run(label: str, decide, decisions: int, concurrency: int, users: int) -> None:
+    keys = [f"bench-rl:{label}:{n}" for n in range(users)]
+    await redis_client.delete(*keys)
+    allowed = 0
+    queue = iter(range(decisions))
+
+    async def worker():
+        nonlocal allowed
+        for i in queue:
+            allowed += await decide(keys[i % users])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await redis_client.delete(*keys)
+    print(f"{label:>15}: {decisions / elapsed:10,.0f} decisions/sec ({allowed} allowed)")
+
+
+async def main(decisions: int, concurrency: int, users: int, limit: int, period: int) -> None:
+    await run("legacy", lambda key: legacy(key, limit, period), decisions, concurrency, users)
+    for policy in ("fixed_window", "sliding_window", "token_bucket"):
+        async def decide(key, policy=policy):
+            allowed, _ = await check_rate_limit(key, limit, period, policy)
+            return allowed
+
+        await run(policy, decide, decisions, concurrency, users)
+    await redis_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--decisions", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--period", type=int, default=60)
+    args = parser.parse_args()
+    asyncio.run(main(args.decisions, args.concurrency, args.users, args.limit, args.period))
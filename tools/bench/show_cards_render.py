@@ -0,0 +1,140 @@
+"""Microbenchmark for rendering /show_cards from a collection.
+
+    python tools/bench/show_cards_render.py --data-dir /app/data --cards 3000
+
+"before" groups, sorts and joins the whole collection and splits it into every
+page, as ShowCardsCog and DeckView used to; "after" reads the cached Inventory's
+lines and builds only the first page. "apply" is the cost of patching the
+cached view after a 10-card pack instead of rebuilding it. Both renderings are
+checked to produce the same pages.
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import benchenv
+
+benchenv.configure()
+
+from bot import catalog as catalog_module  # noqa: E402
+from bot.catalog import load_catalog  # noqa: E402
+from bot.inventory import RARITY_ORDER, Inventory  # noqa: E402
+from bot.views.deck_view import MAX_CHARS_PER_PAGE  # noqa: E402
+
+
+def legacy_text(cards: dict[str, int], card_lookup) -> str:
+    grouped = defaultdict(list)
+    for card_id, qty in cards.items():
+        card = card_lookup.get(card_id)
+        if not card:
+            continue
+        rarity = card.rarity or "Unknown"
+        grouped[card.set.name].append((rarity, card.name, card_id, f"• {card.name} — {rarity} — x{qty}"))
+
+    # Sets sorted by name and the card id tie-break are new (the old order followed
+    # the query's row order); they are added here so the two renderings can be compared.
+    def sort_key(item):
+        rarity, name, card_id, _ = item
+        return (RARITY_ORDER.get(rarity, 99), rarity, name, card_id)
+
+    parts = []
+    for set_name in sorted(grouped):
+        entries = [line for *_, line in sorted(grouped[set_name], key=sort_key)]
+        parts.append(f"📦 **{set_name}**\n" + "\n".join(entries))
+    return "\n\n".join(parts)
+
+
+def legacy_paginate(text: str) -> list[str]:
+    chunks = []
+    buffer = ""
+    current_header = ""
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        is_header = not line.startswith("•")
+        if is_header:
+            line = "\n" + line
+            current_header = line.strip()
+        preview = buffer + ("\n" if buffer else "") + line
+        if len(preview) > MAX_CHARS_PER_PAGE:
+            if buffer:
+                chunks.append(buffer.strip())
+            buffer = line if is_header else f"{current_header} (continued...)\n{line}"
+        else:
+            buffer = preview
+    if buffer:
+        chunks.append(buffer.strip())
+    return chunks
+
+
+def lazy_pages(inventory: Inventory):
+    # DeckView without the discord.ui.View plumbing.
+    from bot.views.deck_view import DeckView
+
+    view = DeckView.__new__(DeckView)
+    view.lines = inventory.lines()
+    view.pages = view._paginate(view.lines)
+    return view
+
+
+def timeit(label: str, fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    per_call = (time.perf_counter() - start) / rounds * 1e6
+    print(f"{label:>6}: {per_call:10,.0f} µs/call")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", type=Path)
+    parser.add_argument("--cards", type=int, default=3000, help="distinct cards in the collection")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            sys.path.insert(0, str(Path(__file__).parent))
+            from synthetic import write_dataset
+
+            data_dir = Path(tmp)
+            write_dataset(str(data_dir))
+        catalog = catalog_module._catalog = load_catalog(data_dir)
+
+    rng = random.Random(0)
+    ids = [card.id for card in catalog.cards]
+    cards = {card_id: rng.randint(1, 5) for card_id in rng.sample(ids, min(args.cards, len(ids)))}
+    inventory = Inventory(dict(cards))
+
+    # Patch the view with random packs and removals, then check it against a rebuild.
+    for _ in range(200):
+        quantities = {}
+        for card_id in rng.sample(ids, 10):
+            qty = cards.get(card_id, 0) + rng.choice((-2, -1, 1, 1, 2))
+            quantities[card_id] = cards[card_id] = max(qty, 0)
+            if qty <= 0:
+                del cards[card_id]
+        inventory.apply(quantities)
+    assert inventory.cards == cards
+    assert inventory.lines() == Inventory(dict(cards)).lines()
+
+    view = lazy_pages(inventory)
+    expected = legacy_paginate(legacy_text(cards, catalog.by_id))
+    assert [view._page_text(i) for i in range(len(view.pages))] == expected
+    print(f"{len(cards)} cards, {len(expected)} pages — renderings match")
+
+    before = timeit("before", lambda: legacy_paginate(legacy_text(cards, catalog.by_id))[0], args.rounds)
+    after = timeit("after", lambda: lazy_pages(inventory)._page_text(0), args.rounds)
+    pack = {card_id: cards.get(card_id, 0) + 1 for card_id in rng.sample(ids, 10)}
+    timeit("apply", lambda: inventory.apply(pack), args.rounds)
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Writes a synthetic cards.json / sets.json / enums.json in the pokemontcg.io shape.
+
+Benchmarks use this when no real catalog is available:
+
+    python tools/bench/synthetic.py /tmp/pokemon-data --sets 160 --cards-per-set 120
+"""
+import argparse
+import json
+import os
+import random
+
+RARITIES = [
+    ("Common", 50),
+    ("Uncommon", 30),
+    ("Rare", 8),
+    ("Rare Holo", 5),
+    ("Double Rare", 3),
+    ("Ultra Rare", 2),
+    ("Special Illustration Rare", 1),
+    ("Hyper Rare", 1),
+]
+TYPES = ["Colorless", "Darkness", "Dragon", "Fairy", "Fighting", "Fire", "Grass", "Lightning", "Metal", "Psychic", "Water"]
+SUBTYPES = ["Basic", "Stage 1", "Stage 2", "V", "VMAX", "ex", "Item", "Supporter"]
+NAMES = ["Pikachu", "Charizard", "Bulbasaur", "Squirtle", "Mewtwo", "Eevee", "Gengar", "Snorlax", "Lucario", "Gardevoir"]
+
+
+def make_sets(n_sets: int) -> list[dict]:
+    sets = []
+    for i in range(n_sets):
+        sets.append({
+            "id": f"set{i}",
+            "name": f"Synthetic Set {i}",
+            "series": f"Series {i // 12}",
+            "printedTotal": 100,
+            "total": 120,
+            "legalities": {"unlimited": "Legal", "expanded": "Legal" if i % 3 else "Banned"},
+            "ptcgoCode": f"S{i:03d}",
+            "releaseDate": f"{1999 + i // 8}/{(i % 12) + 1:02d}/01",
+            "updatedAt": f"2024/{(i % 12) + 1:02d}/01 00:00:00",
+            "images": {
+                "symbol": f"https://images.pokemontcg.io/set{i}/symbol.png",
+                "logo": f"https://images.pokemontcg.io/set{i}/logo.png",
+            },
+        })
+    return sets
+
+
+def make_cards(sets: list[dict], cards_per_set: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    names, weights = zip(*RARITIES)
+    cards = []
+    for card_set in sets:
+        for number in range(1, cards_per_set + 1):
+            cards.append({
+                "id": f"{card_set['id']}-{number}",
+                "name": f"{rng.choice(NAMES)} {rng.choice(['', 'ex', 'V', 'GX'])}".strip(),
+                "supertype": "Pokémon",
+                "subtypes": rng.sample(SUBTYPES, 1),
+                "types": rng.sample(TYPES, rng.choice([1, 1, 2])),
+                "rarity": rng.choices(names, weights)[0],
+                "set": card_set,
+                "number": str(number),
+                "images": {
+                    "small": f"https://images.pokemontcg.io/{card_set['id']}/{number}.png",
+                    "large": f"https://images.pokemontcg.io/{card_set['id']}/{number}_hires.png",
+                },
+            })
+    return cards
+
+
+def write_dataset(data_dir: str, n_sets: int = 160, cards_per_set: int = 120) -> None:
+    os.makedirs(data_dir, exist_ok=True)
+    sets = make_sets(n_sets)
+    enums = {
+        "types": TYPES,
+        "supertypes": ["Energy", "Pokémon", "Trainer"],
+        "subtypes": SUBTYPES,
+        "rarities": [name for name, _ in RARITIES],
+    }
+    for filename, data in [
+        ("cards.json", make_cards(sets, cards_per_set)),
+        ("sets.json", sets),
+        ("enums.json", enums),
+    ]:
+        with open(os.path.join(data_dir, filename), "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("data_dir")
+    parser.add_argument("--sets", type=int, default=160)
+    parser.add_argument("--cards-per-set", type=int, default=120)
+    args = parser.parse_args()
+    write_dataset(args.data_dir, args.sets, args.cards_per_set)
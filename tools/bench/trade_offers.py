@@ -0,0 +1,93 @@
+"""Cost of an unrelated reaction while many trade offers are pending.
+
+    python tools/bench/trade_offers.py --pending 0 1000 10000
+
+"before" parks one bot.wait_for("reaction_add", check=...) per offer, as
+/trade_card used to, so discord.py runs every pending check on every reaction
+in every guild. "after" dispatches raw_reaction_add to TradeCardCog, whose
+listener drops the event with one set lookup; its time includes scheduling
+and running that listener task. No Discord connection or database is needed;
+offers are just message ids.
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import benchenv
+
+benchenv.configure()
+
+import discord  # noqa: E402
+from discord.ext import commands  # noqa: E402
+
+from bot import catalog as catalog_module  # noqa: E402
+from bot.catalog import load_catalog  # noqa: E402
+from bot.commands.trade_card import TradeCardCog  # noqa: E402
+
+
+def new_bot() -> commands.Bot:
+    return commands.Bot(command_prefix="!", intents=discord.Intents.default())
+
+
+async def before(pending: int, reactions: int) -> float:
+    bot = new_bot()
+    await bot._async_setup_hook()
+    waiters = []
+    for message_id in range(pending):
+        def check(reaction, user, message_id=message_id, target_id=message_id + 1):
+            return user.id == target_id and str(reaction.emoji) in {"✅", "❌"} and reaction.message.id == message_id
+        waiters.append(bot.wait_for("reaction_add", check=check))
+
+    reaction = SimpleNamespace(emoji="👍", message=SimpleNamespace(id=-1))
+    user = SimpleNamespace(id=-1)
+    start = time.perf_counter()
+    for _ in range(reactions):
+        bot.dispatch("reaction_add", reaction, user)
+    await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    for waiter in waiters:
+        waiter.close()
+    return elapsed
+
+
+async def after(pending: int, reactions: int) -> float:
+    bot = new_bot()
+    await bot._async_setup_hook()
+    cog = TradeCardCog(bot)
+    # Just the listener: add_cog would run cog_load, which reads the offers from Postgres.
+    bot.add_listener(cog.on_raw_reaction_add)
+    cog.pending_offers = set(range(pending))
+
+    payload = SimpleNamespace(message_id=-1, emoji="👍", user_id=-1)
+    start = time.perf_counter()
+    for _ in range(reactions):
+        bot.dispatch("raw_reaction_add", payload)
+        await asyncio.sleep(0)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pending", type=int, nargs="+", default=[0, 1000, 10000])
+    parser.add_argument("--reactions", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sys.path.insert(0, str(Path(__file__).parent))
+        from synthetic import write_dataset
+
+        write_dataset(tmp, n_sets=4, cards_per_set=40)
+        catalog_module._catalog = load_catalog(Path(tmp))
+
+    for pending in args.pending:
+        old = asyncio.run(before(pending, args.reactions)) / args.reactions * 1e6
+        new = asyncio.run(after(pending, args.reactions)) / args.reactions * 1e6
+        print(f"{pending:>6} pending: before {old:10,.1f} µs/reaction, after {new:6,.1f} µs/reaction")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Microbenchmark for resolving /trade_card options to catalog cards.
+
+    python tools/bench/trade_resolve.py --data-dir /app/data --trades 2000
+
+"before" scans the catalog for the first card with a matching set and name, as
+TradeCardCog used to; "after" goes through Catalog.resolve_card with the card
+id an autocomplete choice carries, and with a typed "name #number". Also
+counts the cards the old scan resolved to the wrong printing.
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import benchenv
+
+benchenv.configure()
+
+from bot.catalog import load_catalog  # noqa: E402
+
+
+def run(label: str, resolve, picks: list, trades: int) -> float:
+    start = time.perf_counter()
+    for i in range(trades):
+        resolve(picks[i % len(picks)])
+    per_call = (time.perf_counter() - start) / trades * 1e6
+    print(f"{label:>13}: {per_call:10,.1f} µs/card")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", type=Path)
+    parser.add_argument("--trades", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            sys.path.insert(0, str(Path(__file__).parent))
+            from synthetic import write_dataset
+
+            data_dir = Path(tmp)
+            write_dataset(str(data_dir))
+        catalog = load_catalog(data_dir)
+
+    picks = random.Random(0).sample(catalog.cards, min(1000, len(catalog)))
+
+    def legacy(card):
+        return next((c for c in catalog.cards if c.name == card.name and c.set.name == card.set.name), None)
+
+    wrong = sum(legacy(card) is not card for card in picks)
+    assert all(catalog.resolve_card(card.set.name, card.id) is card for card in picks)
+    assert all(catalog.resolve_card(card.set.name, catalog.card_label(card)) is card for card in picks)
+    print(f"{len(catalog)} cards; the old scan picked the wrong printing for {wrong}/{len(picks)}")
+
+    before = run("before", legacy, picks, args.trades)
+    after = run("after (id)", lambda card: catalog.resolve_card(card.set.name, card.id), picks, args.trades)
+    labels = [(card.set.name, catalog.card_label(card)) for card in picks]
+    run("after (typed)", lambda pick: catalog.resolve_card(*pick), labels, args.trades)
+    print(f"speedup: {before / after:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Concurrency stress test for db.execute_trade against a local Postgres.
+
+    DB_HOST=localhost python tools/bench/trade_stress.py --users 20 --trades 2000
+
+Seeds a pool of players, fires random multi-card trades concurrently (many of
+which are rejected because a side no longer owns the cards), then checks that
+the total quantity of every card across all players is unchanged.
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+import benchenv
+
+benchenv.configure()
+
+from bot import db  # noqa: E402
+
+CARD_IDS = [f"stress-{n}" for n in range(40)]
+
+
+async def card_totals(user_ids: list[str]) -> Counter:
+    async with db.DB_POOL.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT card_id, SUM(qty) FROM player_card_inventory
+                WHERE discord_id = ANY(%s) GROUP BY card_id
+                """,
+                (user_ids,),
+            )
+            return Counter({card_id: int(total) for card_id, total in await cur.fetchall()})
+
+
+async def reset(user_ids: list[str]) -> None:
+    async with db.DB_POOL.connection() as conn:
+        await conn.execute(
+            "DELETE FROM player_card_inventory WHERE discord_id = ANY(%s)", (user_ids,)
+        )
+    for discord_id in user_ids:
+        await db.add_cards(discord_id, {card_id: random.randint(1, 3) for card_id in random.sample(CARD_IDS, 15)})
+
+
+def random_bundle() -> dict[str, int]:
+    return {card_id: 1 for card_id in random.sample(CARD_IDS, random.randint(1, 3))}
+
+
+async def trade(user_ids: list[str], outcomes: Counter) -> None:
+    a, b = random.sample(user_ids, 2)
+    try:
+        await db.execute_trade(a, b, random_bundle(), random_bundle())
+        outcomes["completed"] += 1
+    except ValueError:
+        outcomes["rejected"] += 1
+    except Exception as e:
+        outcomes[type(e).__name__] += 1
+
+
+async def main(users: int, trades: int, concurrency: int) -> None:
+    await db.open_pool()
+    user_ids = [f"stress-user-{n}" for n in range(users)]
+    await reset(user_ids)
+    before = await card_totals(user_ids)
+
+    outcomes: Counter = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded():
+        async with semaphore:
+            await trade(user_ids, outcomes)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded() for _ in range(trades)))
+    elapsed = time.perf_counter() - start
+
+    after = await card_totals(user_ids)
+    await db.DB_POOL.close()
+
+    print(f"trades: {trades} in {elapsed:.2f}s ({trades / elapsed:.0f}/s) -> {dict(outcomes)}")
+    if before != after:
+        diff = {k: after[k] - before[k] for k in before.keys() | after.keys() if after[k] != before[k]}
+        raise SystemExit(f"card totals NOT conserved: {diff}")
+    print(f"card totals conserved across {len(before)} cards ({sum(before.values())} copies)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--trades", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.trades, args.concurrency))
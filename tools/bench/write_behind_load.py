@@ -0,0 +1,125 @@
+"""Pack-reward throughput with and without the write-behind buffer, against a local Postgres.
+
+    DB_HOST=localhost python tools/bench/write_behind_load.py --users 20 --packs 5000 --concurrency 200
+
+Fires --packs rewards of 10 cards from --concurrency concurrent openers spread
+over --users players (few players = hot rows and contended player locks).
+"sync" awaits db.add_cards per pack, as /open_pack did; "write-behind" calls
+db.reward_cards with a WriteBehindBuffer installed. Each opener then waits
+--reply-ms, standing in for the Discord response, so flushes interleave with
+rewards. Meanwhile a reader keeps calling db.get_cards and checks it never
+misses an acknowledged reward. Throughput counts until the final flush is
+done, and every player's stored totals must then match what was granted.
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+import benchenv
+
+benchenv.configure()
+
+from bot import db  # noqa: E402
+from bot.write_behind import WriteBehindBuffer  # noqa: E402
+
+CARD_IDS = [f"load-{n}" for n in range(60)]
+CARDS_PER_PACK = 10
+
+
+async def totals(user_ids: list[str]) -> dict[str, int]:
+    async with db.DB_POOL.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT discord_id, SUM(qty) FROM player_card_inventory WHERE discord_id = ANY(%s) GROUP BY 1",
+                (user_ids,),
+            )
+            return {discord_id: int(total) for discord_id, total in await cur.fetchall()}
+
+
+async def reset(user_ids: list[str]) -> None:
+    async with db.DB_POOL.connection() as conn:
+        await conn.execute("DELETE FROM player_card_inventory WHERE discord_id = ANY(%s)", (user_ids,))
+
+
+async def run(label: str, reward, user_ids: list[str], packs: int, concurrency: int, reply: float) -> None:
+    await reset(user_ids)
+    rng = random.Random(0)
+    granted: Counter = Counter()  # handed to reward(), maybe not acknowledged yet
+    acknowledged: Counter = Counter()
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+    violations = 0
+
+    async def open_pack(discord_id: str, cards: dict[str, int]) -> None:
+        async with semaphore:
+            granted[discord_id] += CARDS_PER_PACK
+            start = time.perf_counter()
+            await reward(discord_id, cards)
+            latencies.append((time.perf_counter() - start) * 1e3)
+            acknowledged[discord_id] += CARDS_PER_PACK
+            await asyncio.sleep(reply)
+
+    async def reader() -> None:
+        nonlocal violations
+        while not done.is_set():
+            discord_id = rng.choice(user_ids)
+            floor = acknowledged[discord_id]
+            seen = sum((await db.get_cards(discord_id)).values())
+            if not floor <= seen <= granted[discord_id]:
+                violations += 1
+
+    jobs = []
+    for _ in range(packs):
+        cards = Counter(rng.choices(CARD_IDS, k=CARDS_PER_PACK))
+        jobs.append(open_pack(rng.choice(user_ids), dict(cards)))
+
+    reading = asyncio.create_task(reader())
+    start = time.perf_counter()
+    await asyncio.gather(*jobs)
+    elapsed = time.perf_counter() - start
+    done.set()
+    await reading
+
+    flush_start = time.perf_counter()
+    if db.WRITE_BEHIND is not None:
+        await db.WRITE_BEHIND.close()
+    flush = time.perf_counter() - flush_start
+
+    print(
+        f"{label:>12}: {packs / (elapsed + flush):8,.0f} packs/s written, "
+        f"p50 {benchenv.percentile(latencies, 50):7.2f} ms, p99 {benchenv.percentile(latencies, 99):7.2f} ms, "
+        f"final flush {flush * 1e3:.1f} ms, stale reads {violations}"
+    )
+    stored = await totals(user_ids)
+    if stored != dict(granted):
+        raise SystemExit(f"{label}: stored totals differ from granted: {stored} != {dict(granted)}")
+
+
+async def main(users: int, packs: int, concurrency: int, interval_ms: int, reply_ms: float) -> None:
+    await db.open_pool()
+    user_ids = [f"load-user-{n}" for n in range(users)]
+
+    db.WRITE_BEHIND = None
+    await run("sync", db.add_cards, user_ids, packs, concurrency, reply_ms / 1000)
+
+    db.WRITE_BEHIND = WriteBehindBuffer(db._write_rewards, interval=interval_ms / 1000, max_cards=5000)
+    db.WRITE_BEHIND.start()
+    await run("write-behind", db.reward_cards, user_ids, packs, concurrency, reply_ms / 1000)
+
+    db.WRITE_BEHIND = None
+    await reset(user_ids)
+    await db.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--packs", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--interval-ms", type=int, default=50)
+    parser.add_argument("--reply-ms", type=float, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.packs, args.concurrency, args.interval_ms, args.reply_ms))